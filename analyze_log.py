@@ -5,7 +5,8 @@ Standalone script to analyze a specific error log file.
 import sys
 import argparse
 from pathlib import Path
-from src.logagent import LogAgent
+from config import LogAgentConfig
+from src.cli import run_analysis
 
 
 def main():
@@ -37,7 +38,12 @@ def main():
     parser.add_argument(
         "--use-memory",
         action="store_true",
-        help="Use in-memory database instead of Qdrant server"
+        help="Use a local database instead of Qdrant server (cached on disk between runs)"
+    )
+    parser.add_argument(
+        "--no-index-cache",
+        action="store_true",
+        help="With --use-memory, re-index from scratch into a throwaway in-memory database"
     )
     parser.add_argument(
         "--model",
@@ -53,38 +59,20 @@ def main():
         print(f"Error: Log file not found: {args.log_file}")
         sys.exit(1)
 
-    # Initialize LogAgent
-    print("Initializing LogAgent...")
-    agent = LogAgent(
-        use_memory_db=args.use_memory,
-        embedding_model=args.model
-    )
-
-    # Setup
-    agent.setup()
-
-    # Index codebase
-    print(f"\nIndexing codebase: {args.codebase}")
-    codebase_path = Path(args.codebase)
-    if codebase_path.exists():
-        num_chunks = agent.index_codebase(str(codebase_path))
-        print(f"Indexed {num_chunks} code chunks")
-    else:
-        print(f"Warning: Codebase path not found: {args.codebase}")
-        print("Proceeding without indexing...")
-
-    # Show stats
-    agent.get_stats()
-
-    # Analyze the log file
-    print(f"\nAnalyzing error log: {args.log_file}")
-    print("=" * 80)
-
-    result = agent.analyze_error_log_file(
+    # With a local database, reuse the index from a previous run if the
+    # codebase hasn't changed
+    config = LogAgentConfig()
+    run_analysis(
         args.log_file,
+        args.codebase,
+        use_llm=True,
         num_results=args.num_results,
         min_score=args.min_score,
-        show_report=True
+        embedding_model=args.model,
+        use_memory_db=args.use_memory,
+        index_cache=args.use_memory and not args.no_index_cache,
+        index_cache_dir=config.index_cache_dir,
+        agent_options=config.agent_options()
     )
 
     # Additional recommendations
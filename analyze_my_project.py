@@ -8,7 +8,8 @@ Configured for: /home/jayden/aoi
 import sys
 import os
 from dotenv import load_dotenv
-from src.logagent import LogAgent
+from config import LogAgentConfig
+from src.cli import run_analysis
 
 def main():
     # Load environment variables
@@ -69,26 +70,6 @@ def main():
     print(f"📄 Log file: {log_file}")
     print()
 
-    # Initialize LogAgent with Claude AI
-    print("Initializing LogAgent with Claude AI...")
-    agent = LogAgent(
-        use_memory_db=True,      # Fast in-memory database
-        use_llm=True,            # Enable Claude AI
-        claude_model="claude-sonnet-4-20250514",
-        verbose=args.verbose,    # Show prompts if --verbose
-        save_prompts=args.save_prompts,  # Save prompts if --save-prompts
-        prompts_dir=args.prompts_dir
-    )
-
-    # Setup
-    agent.setup()
-    print()
-
-    # Index your codebase
-    print("=" * 80)
-    print("Step 1: Indexing codebase at /home/jayden/aoi")
-    print("=" * 80)
-
     codebase_path = "/home/jayden/aoi"
 
     if not os.path.exists(codebase_path):
@@ -97,25 +78,21 @@ def main():
         print()
         sys.exit(1)
 
-    num_chunks = agent.index_codebase(codebase_path)
-    print(f"\n✓ Indexed {num_chunks} code chunks from {codebase_path}")
-    print()
-
-    # Show stats
-    agent.get_stats()
-    print()
-
-    # Analyze the error log with Claude AI
-    print("=" * 80)
-    print("Step 2: Analyzing error log with Claude AI")
-    print("=" * 80)
-    print()
-
-    result = agent.analyze_error_log_file(
+    config = LogAgentConfig()
+    result = run_analysis(
         log_file,
+        codebase_path,
+        use_llm=True,            # Enable Claude AI
         num_results=args.num_results,  # From --num-results flag
         min_score=args.min_score,      # From --min-score flag
-        show_report=True               # Print the full report
+        embedding_model=config.embedding_model,
+        claude_model="claude-sonnet-4-20250514",
+        index_cache=True,        # Local database, kept between runs
+        index_cache_dir=config.index_cache_dir,
+        verbose=args.verbose,    # Show prompts if --verbose
+        save_prompts=args.save_prompts,  # Save prompts if --save-prompts
+        prompts_dir=args.prompts_dir,
+        agent_options=config.agent_options()  # Storage/embedding settings from config.py
     )
 
     print()
@@ -3,7 +3,7 @@ Configuration settings for LogAgent.
 """
 
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Dict, Optional
 
 
 @dataclass
@@ -13,29 +13,55 @@ class LogAgentConfig:
     # Qdrant settings
     qdrant_host: str = "localhost"
     qdrant_port: int = 6333
+    qdrant_grpc_port: int = 6334
+    prefer_grpc: bool = True  # gRPC instead of REST for a Qdrant server (lower per-request overhead)
     collection_name: str = "code_chunks"
     use_memory_db: bool = False
+    quantization: Optional[str] = "scalar"  # 'scalar' (int8) or 'binary' (1-bit) in RAM, rescored from disk
+    search_profile: str = "balanced"  # 'fast', 'balanced' or 'recall-max'
+    float16_vectors: bool = True  # Store vectors as float16 (needs Qdrant >= 1.9)
 
     # Embedding settings
-    embedding_model: str = "intfloat/e5-base-v2"
+    embedding_model: str = "intfloat/e5-base-v2"  # With use_fastembed, must be a fastembed-supported model
     device: Optional[str] = None  # 'cuda', 'cpu', or None for auto-detect
+    use_embedding_cache: bool = True  # Reuse code and query embeddings across runs
+    embedding_cache_path: str = "~/.cache/logagent/embeddings.sqlite"
+    use_onnx: bool = False  # ONNX Runtime backend, needs optimum[onnxruntime]
+    use_fastembed: bool = False  # Prequantized ONNX weights on CPU, needs fastembed
 
     # LLM settings (Claude)
     use_llm: bool = True
     claude_model: str = "claude-sonnet-4-20250514"
     anthropic_api_key: Optional[str] = None
+    enable_prompt_cache: bool = True  # Cache instructions + code context server-side
 
     # Codebase settings
     default_codebase_path: str = "/home/jayden/aoi"  # Default path to index
     file_pattern: str = "**/*.py"  # Pattern for files to index
+    index_cache_dir: str = "~/.cache/logagent"  # Indexes reused between script runs
 
     # Code splitting settings
-    small_file_threshold: int = 1000  # Characters
+    small_file_threshold: int = 1000  # Bytes
 
     # Search settings
     default_num_results: int = 5
     default_min_score: float = 0.3
 
+    def agent_options(self) -> Dict[str, Any]:
+        """Storage, embedding and Claude options to pass on to LogAgent (see cli.run_analysis)."""
+        return {
+            "qdrant_grpc_port": self.qdrant_grpc_port,
+            "prefer_grpc": self.prefer_grpc,
+            "quantization": self.quantization,
+            "search_profile": self.search_profile,
+            "float16_vectors": self.float16_vectors,
+            "use_embedding_cache": self.use_embedding_cache,
+            "embedding_cache_path": self.embedding_cache_path,
+            "use_onnx": self.use_onnx,
+            "use_fastembed": self.use_fastembed,
+            "enable_prompt_cache": self.enable_prompt_cache,
+        }
+
     @classmethod
     def for_development(cls):
         """Get configuration for development/testing."""
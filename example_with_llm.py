@@ -10,6 +10,7 @@ Before running:
 import os
 from dotenv import load_dotenv
 from src.logagent import LogAgent
+from src.cli import configure_logging
 
 
 def main():
@@ -123,4 +124,5 @@ TypeError: error() got an unexpected keyword argument 'error'
 
 
 if __name__ == "__main__":
+    configure_logging()
     main()
@@ -8,6 +8,7 @@ Example usage demonstrating the main features:
 """
 
 from src.logagent import LogAgent
+from src.cli import configure_logging
 
 
 def main():
@@ -77,4 +78,5 @@ def main():
 
 
 if __name__ == '__main__':
+    configure_logging()
     main()
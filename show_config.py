@@ -22,11 +22,13 @@ def main():
     print("📁 Codebase Settings:")
     print(f"   Default codebase path: {config.default_codebase_path}")
     print(f"   File pattern:          {config.file_pattern}")
+    print(f"   Index cache dir:       {config.index_cache_dir}")
     print()
 
     print("🤖 Claude AI Settings:")
     print(f"   Use LLM:               {config.use_llm}")
     print(f"   Model:                 {config.claude_model}")
+    print(f"   Prompt caching:        {config.enable_prompt_cache}")
     api_key = os.environ.get("ANTHROPIC_API_KEY")
     if api_key and api_key != "your_api_key_here":
         print(f"   API Key:               {api_key[:10]}...{api_key[-4:]} ✓")
@@ -43,16 +45,23 @@ def main():
     print(f"   Use in-memory:         {config.use_memory_db}")
     print(f"   Qdrant host:           {config.qdrant_host}")
     print(f"   Qdrant port:           {config.qdrant_port}")
+    print(f"   Qdrant gRPC port:      {config.qdrant_grpc_port}")
+    print(f"   Prefer gRPC:           {config.prefer_grpc}")
     print(f"   Collection name:       {config.collection_name}")
+    print(f"   Quantization:          {config.quantization}")
+    print(f"   Search profile:        {config.search_profile}")
+    print(f"   Float16 vectors:       {config.float16_vectors}")
     print()
 
     print("🧠 Embedding Settings:")
     print(f"   Model:                 {config.embedding_model}")
     print(f"   Device:                {config.device or 'auto'}")
+    print(f"   Backend:               {'fastembed (CPU)' if config.use_fastembed else 'onnxruntime' if config.use_onnx else 'sentence-transformers'}")
+    print(f"   Embedding cache:       {config.embedding_cache_path if config.use_embedding_cache else 'disabled'}")
     print()
 
     print("📄 Code Splitting:")
-    print(f"   Small file threshold:  {config.small_file_threshold} chars")
+    print(f"   Small file threshold:  {config.small_file_threshold} bytes")
     print()
 
     print("=" * 70)
@@ -65,9 +74,9 @@ def main():
 
     print("💡 Quick Commands:")
     print("=" * 70)
-    print(f"   Edit codebase path:    nano config.py  # Line 29")
+    print(f"   Edit codebase path:    nano config.py  # default_codebase_path")
     print(f"   Edit API key:          nano .env")
-    print(f"   Change model:          nano config.py  # Line 25")
+    print(f"   Change model:          nano config.py  # claude_model")
     print()
 
     print("📚 See Also:")
@@ -0,0 +1,132 @@
+"""
+Shared command-line workflow: index a codebase and analyze an error log.
+
+The analyze_*.py scripts only parse their arguments and call run_analysis.
+"""
+
+import logging
+from pathlib import Path
+from typing import Any, Dict, Optional
+from .logagent import LogAgent
+from .indexer import codebase_key
+from .query_interface import AnalysisResult
+
+
+DEFAULT_INDEX_CACHE_DIR = "~/.cache/logagent"
+# Analyses saved next to a cached index, reused on the next run
+QUERY_CACHE_FILE = "analyses.pkl"
+
+
+def configure_logging(verbose: bool = False):
+    """
+    Send LogAgent's progress messages to stderr.
+
+    Args:
+        verbose: Also show per-file (DEBUG) messages
+    """
+    logging.basicConfig(format="%(message)s")
+    # Only this package's loggers; HTTP clients log every request at INFO
+    logging.getLogger(__package__).setLevel(logging.DEBUG if verbose else logging.INFO)
+
+
+def run_analysis(
+    log_file: str,
+    codebase: str,
+    *,
+    use_llm: bool = True,
+    num_results: int = 5,
+    min_score: float = 0.3,
+    embedding_model: str = "intfloat/e5-base-v2",
+    claude_model: str = "claude-sonnet-4-20250514",
+    use_memory_db: bool = False,
+    index_cache: bool = True,
+    index_cache_dir: str = DEFAULT_INDEX_CACHE_DIR,
+    verbose: bool = False,
+    save_prompts: bool = False,
+    prompts_dir: str = "./prompts",
+    agent_options: Optional[Dict[str, Any]] = None
+) -> AnalysisResult:
+    """
+    Index a codebase and analyze an error log against it.
+
+    Args:
+        log_file: Path to the error log file
+        codebase: Path to the codebase to index
+        use_llm: Whether to use Claude for the analysis
+        num_results: Number of relevant code chunks to retrieve
+        min_score: Minimum similarity score
+        embedding_model: Name of the embedding model to use
+        claude_model: Claude model to use
+        use_memory_db: Use a throwaway in-memory database instead of a Qdrant server
+        index_cache: Keep the index in a local database under index_cache_dir and
+            only re-index files that changed on later runs (analyses of
+            unchanged code are reused too)
+        index_cache_dir: Directory holding cached indexes
+        verbose: Print prompts sent to Claude and responses
+        save_prompts: Save prompts and responses to files
+        prompts_dir: Directory to save prompts
+        agent_options: Further LogAgent keyword arguments, e.g.
+            LogAgentConfig.agent_options()
+
+    Returns:
+        AnalysisResult for the log file
+    """
+    configure_logging(verbose)
+    # The same absolute path keys the cached index and is indexed below
+    codebase_path = Path(codebase).resolve()
+
+    # Keep one local index per codebase; files unchanged since the previous
+    # run are skipped when indexing
+    index_path = None
+    if index_cache and codebase_path.exists():
+        index_path = Path(index_cache_dir).expanduser() / f"index-{codebase_key(str(codebase_path), embedding_model)}"
+
+    # Initialize LogAgent
+    print("Initializing LogAgent" + (" with Claude AI..." if use_llm else "..."))
+    agent = LogAgent(
+        use_memory_db=use_memory_db and index_path is None,
+        qdrant_path=str(index_path) if index_path else None,
+        query_cache_path=str(index_path / QUERY_CACHE_FILE) if index_path else None,
+        embedding_model=embedding_model,
+        use_llm=use_llm,
+        claude_model=claude_model,
+        verbose=verbose,
+        save_prompts=save_prompts,
+        prompts_dir=prompts_dir,
+        **(agent_options or {})
+    )
+
+    # Setup
+    agent.setup()
+    print()
+
+    # Index codebase
+    print("=" * 80)
+    print(f"Step 1: Indexing codebase at {codebase}")
+    print("=" * 80)
+
+    if codebase_path.exists():
+        num_chunks = agent.index_codebase(str(codebase_path))
+        print(f"\n✓ Indexed {num_chunks} code chunks from {codebase}")
+    else:
+        print(f"⚠ Warning: Codebase path not found: {codebase}")
+        print("Proceeding without indexing...")
+    print()
+
+    # Show stats
+    agent.get_stats()
+    print()
+
+    # Analyze the error log
+    print("=" * 80)
+    print("Step 2: Analyzing error log" + (" with Claude AI" if use_llm else ""))
+    print("=" * 80)
+    print()
+
+    return agent.analyze_error_log_file(
+        log_file,
+        num_results=num_results,
+        min_score=min_score,
+        show_report=True
+    )
+
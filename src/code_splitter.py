@@ -1,15 +1,35 @@
 """
 AST-based code splitter that splits code at meaningful semantic boundaries.
 Handles functions, classes, and modules while preserving context.
+
+Files are parsed with tree-sitter when it is installed, and with Python's
+built-in ast module otherwise.
 """
 
 import ast
-from typing import List, Dict, Any
+import itertools
+import logging
+import mmap
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from pathlib import Path
 from dataclasses import dataclass
+import numpy as np
+
+try:
+    import tree_sitter_python
+    from tree_sitter import Language, Parser
+    TREE_SITTER_AVAILABLE = True
+except ImportError:
+    TREE_SITTER_AVAILABLE = False
+
 
+logger = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class CodeChunk:
     """Represents a semantically meaningful chunk of code."""
     content: str
@@ -30,26 +50,38 @@ class CodeChunk:
             "end_line": self.end_line,
             "parent_context": self.parent_context,
             "size": len(self.content),
-            "content": self.content  # Store actual code content
+            "content": self.content  # Same string object as the chunk, not a copy
         }
 
 
 class ASTCodeSplitter:
     """Splits code into meaningful chunks using AST parsing."""
 
-    def __init__(self, small_file_threshold: int = 1000):
+    # Fewer files than this are split in-process; starting worker
+    # processes costs more than it saves
+    PARALLEL_MIN_FILES = 64
+
+    def __init__(self, small_file_threshold: int = 1000, use_tree_sitter: bool = True):
         """
         Initialize the code splitter.
 
         Args:
-            small_file_threshold: Files under this size (in characters) stay whole
+            small_file_threshold: Files under this size (in bytes) stay whole
+            use_tree_sitter: Parse with tree-sitter when it is installed
         """
         self.small_file_threshold = small_file_threshold
+        self.use_tree_sitter = use_tree_sitter
+        self.parser = None
+        if use_tree_sitter and TREE_SITTER_AVAILABLE:
+            self.parser = Parser(Language(tree_sitter_python.language()))
 
     def split_python_file(self, file_path: str) -> List[CodeChunk]:
         """
         Split a Python file into semantic chunks.
 
+        The file is memory-mapped and parsed as bytes; only the spans that
+        become chunks are decoded to text.
+
         Args:
             file_path: Path to the Python file
 
@@ -61,61 +93,161 @@ class ASTCodeSplitter:
         if not file_path_obj.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
 
-        with open(file_path, 'r', encoding='utf-8') as f:
-            source_code = f.read()
+        fd = os.open(file_path, os.O_RDONLY)
+        try:
+            if os.fstat(fd).st_size == 0:
+                # Empty files cannot be memory-mapped
+                source = b''
+            else:
+                source = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        finally:
+            os.close(fd)
+
+        try:
+            return self._split_source(source, file_path, file_path_obj.name)
+        finally:
+            if isinstance(source, mmap.mmap):
+                source.close()
+
+    def _split_source(self, source, file_path: str, file_name: str) -> List[CodeChunk]:
+        """Split the raw bytes (or memory map) of a Python file into chunks."""
+        line_offsets = _line_offsets(source)
 
         # If file is small, keep it whole
-        if len(source_code) < self.small_file_threshold:
-            return [CodeChunk(
-                content=source_code,
-                file_path=file_path,
-                chunk_type='whole_file',
-                name=file_path_obj.name,
-                start_line=1,
-                end_line=source_code.count('\n') + 1
-            )]
+        if len(source) < self.small_file_threshold:
+            return [self._whole_file_chunk(source, line_offsets, file_path, file_name)]
+
+        # Without a top-level def/class nothing can be extracted; skip parsing
+        if not _may_define(source):
+            return [self._whole_file_chunk(source, line_offsets, file_path, file_name)]
+
+        if self.parser is not None:
+            chunks = self._split_tree_sitter(source, line_offsets, file_path)
+        else:
+            chunks = self._split_ast(source, line_offsets, file_path)
+
+        # If parsing fails, return the whole file as one chunk
+        if chunks is None:
+            return [self._whole_file_chunk(source, line_offsets, file_path, file_name)]
+
+        # Drop any chunk emitted twice for the same span
+        seen = set()
+        unique_chunks = []
+        for chunk in chunks:
+            key = (chunk.file_path, chunk.start_line, chunk.end_line, chunk.chunk_type)
+            if key not in seen:
+                seen.add(key)
+                unique_chunks.append(chunk)
+        chunks = unique_chunks
 
-        # Parse the file
+        # If no chunks were extracted, return the whole file
+        if not chunks:
+            return [self._whole_file_chunk(source, line_offsets, file_path, file_name)]
+
+        return chunks
+
+    def _split_ast(
+        self,
+        source,
+        line_offsets: List[int],
+        file_path: str
+    ) -> Optional[List[CodeChunk]]:
+        """Extract chunks using the ast module (None if the file does not parse)."""
         try:
-            tree = ast.parse(source_code)
-        except SyntaxError as e:
-            # If parsing fails, return the whole file as one chunk
-            return [CodeChunk(
-                content=source_code,
-                file_path=file_path,
-                chunk_type='whole_file',
-                name=file_path_obj.name,
-                start_line=1,
-                end_line=source_code.count('\n') + 1
-            )]
+            tree = ast.parse(source, filename=file_path)
+        except (SyntaxError, ValueError):
+            return None
 
         chunks = []
-        source_lines = source_code.split('\n')
 
-        # Extract top-level definitions
-        for node in ast.walk(tree):
+        # Extract top-level definitions (methods are handled by _extract_class)
+        for node in tree.body:
             if isinstance(node, ast.FunctionDef):
-                chunks.extend(self._extract_function(node, source_lines, file_path))
+                chunks.extend(self._extract_function(node, source, line_offsets, file_path))
             elif isinstance(node, ast.ClassDef):
-                chunks.extend(self._extract_class(node, source_lines, file_path))
+                chunks.extend(self._extract_class(node, source, line_offsets, file_path))
 
-        # If no chunks were extracted, return the whole file
-        if not chunks:
-            return [CodeChunk(
-                content=source_code,
+        return chunks
+
+    def _split_tree_sitter(
+        self,
+        source,
+        line_offsets: List[int],
+        file_path: str
+    ) -> Optional[List[CodeChunk]]:
+        """Extract chunks using tree-sitter (None if the file does not parse)."""
+        root = self.parser.parse(source).root_node
+        if root.has_error:
+            # Match ast, which rejects files with syntax errors
+            return None
+
+        chunks = []
+
+        for node in _definitions(root):
+            name = _node_name(node, source)
+            start_line = node.start_point[0] + 1
+            end_line = node.end_point[0] + 1
+
+            if node.type == 'function_definition':
+                chunks.append(CodeChunk(
+                    content=_slice_lines(source, line_offsets, start_line, end_line),
+                    file_path=file_path,
+                    chunk_type='function',
+                    name=name,
+                    start_line=start_line,
+                    end_line=end_line
+                ))
+                continue
+
+            chunks.append(CodeChunk(
+                content=_slice_lines(source, line_offsets, start_line, end_line),
                 file_path=file_path,
-                chunk_type='whole_file',
-                name=file_path_obj.name,
-                start_line=1,
-                end_line=len(source_lines)
-            )]
+                chunk_type='class',
+                name=name,
+                start_line=start_line,
+                end_line=end_line
+            ))
+
+            # Extract methods separately for better granularity
+            for item in _definitions(node.child_by_field_name('body')):
+                if item.type != 'function_definition':
+                    continue
+                method_start = item.start_point[0] + 1
+                method_end = item.end_point[0] + 1
+                chunks.append(CodeChunk(
+                    content=_slice_lines(source, line_offsets, method_start, method_end),
+                    file_path=file_path,
+                    chunk_type='method',
+                    name=_node_name(item, source),
+                    start_line=method_start,
+                    end_line=method_end,
+                    parent_context=name
+                ))
 
         return chunks
 
+    def _whole_file_chunk(
+        self,
+        source,
+        line_offsets: List[int],
+        file_path: str,
+        file_name: str
+    ) -> CodeChunk:
+        """Build a single chunk covering the whole file."""
+        return CodeChunk(
+            content=_decode(source[:]),
+            file_path=file_path,
+            chunk_type='whole_file',
+            name=file_name,
+            start_line=1,
+            end_line=len(line_offsets)
+        )
+
     def _extract_function(
         self,
         node: ast.FunctionDef,
-        source_lines: List[str],
+        source,
+        line_offsets: List[int],
         file_path: str,
         parent_class: str = ""
     ) -> List[CodeChunk]:
@@ -124,7 +256,7 @@ class ASTCodeSplitter:
         end_line = node.end_lineno or start_line
 
         # Get the function content with proper indentation
-        content = '\n'.join(source_lines[start_line - 1:end_line])
+        content = _slice_lines(source, line_offsets, start_line, end_line)
 
         chunk_type = 'method' if parent_class else 'function'
 
@@ -141,7 +273,8 @@ class ASTCodeSplitter:
     def _extract_class(
         self,
         node: ast.ClassDef,
-        source_lines: List[str],
+        source,
+        line_offsets: List[int],
         file_path: str
     ) -> List[CodeChunk]:
         """Extract a class and its methods as code chunks."""
@@ -151,7 +284,7 @@ class ASTCodeSplitter:
         start_line = node.lineno
         end_line = node.end_lineno or start_line
 
-        class_content = '\n'.join(source_lines[start_line - 1:end_line])
+        class_content = _slice_lines(source, line_offsets, start_line, end_line)
 
         chunks.append(CodeChunk(
             content=class_content,
@@ -168,7 +301,8 @@ class ASTCodeSplitter:
                 chunks.extend(
                     self._extract_function(
                         item,
-                        source_lines,
+                        source,
+                        line_offsets,
                         file_path,
                         parent_class=node.name
                     )
@@ -176,26 +310,199 @@ class ASTCodeSplitter:
 
         return chunks
 
-    def split_directory(self, directory_path: str, pattern: str = "**/*.py") -> List[CodeChunk]:
+    def split_directory(
+        self,
+        directory_path: str,
+        pattern: str = "**/*.py",
+        max_workers: Optional[int] = None
+    ) -> List[CodeChunk]:
         """
         Split all Python files in a directory into chunks.
 
+        Files are parsed in parallel across worker processes.
+
         Args:
             directory_path: Path to the directory
             pattern: Glob pattern for files to process
+            max_workers: Number of worker processes (defaults to the CPU count)
 
         Returns:
             List of all CodeChunk objects from all files
         """
-        dir_path = Path(directory_path)
-        all_chunks = []
-
-        for file_path in dir_path.glob(pattern):
-            if file_path.is_file():
-                try:
-                    chunks = self.split_python_file(str(file_path))
-                    all_chunks.extend(chunks)
-                except Exception as e:
-                    print(f"Error processing {file_path}: {e}")
-
-        return all_chunks
+        file_paths = find_python_files(directory_path, pattern)
+        results = self.iter_split(file_paths, max_workers=max_workers)
+        return list(itertools.chain.from_iterable(chunks for _, chunks in results))
+
+    def iter_split(
+        self,
+        file_paths: List[Any],
+        max_workers: Optional[int] = None
+    ) -> Iterator[Tuple[str, List[CodeChunk]]]:
+        """
+        Split files in parallel worker processes, yielding each file's chunks.
+
+        Results are yielded in input order as soon as they are available, so
+        callers can start on the first files while later ones are parsed.
+        Files that fail to split yield an empty list.
+
+        Fewer than PARALLEL_MIN_FILES files, and subclasses (whose
+        overrides workers would not see), are split in this process. Workers
+        are started with forkserver (spawn where unavailable) rather than
+        fork, which is unsafe in a process already running gRPC or torch
+        threads.
+
+        Args:
+            file_paths: Paths of the Python files to split
+            max_workers: Number of worker processes (defaults to the CPU count)
+
+        Yields:
+            (file_path, chunks) for every input file
+        """
+        file_paths = [str(file_path) for file_path in file_paths]
+        if not file_paths:
+            return
+
+        if len(file_paths) < self.PARALLEL_MIN_FILES or type(self) is not ASTCodeSplitter:
+            for file_path in file_paths:
+                yield file_path, _split_or_warn(self, file_path)
+            return
+
+        # Workers rebuild the splitter from its constructor arguments (a
+        # tree-sitter parser cannot be pickled)
+        config = (self.small_file_threshold, self.use_tree_sitter)
+        jobs = [(file_path, config) for file_path in file_paths]
+        method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        with ProcessPoolExecutor(
+            max_workers=min(max_workers or os.cpu_count() or 1, len(jobs)),
+            mp_context=multiprocessing.get_context(method)
+        ) as executor:
+            results = executor.map(_split_one, jobs, chunksize=16)
+            for file_path, chunks in zip(file_paths, results):
+                yield file_path, chunks
+
+
+DEFAULT_PATTERN = "**/*.py"
+
+
+def find_python_files(directory_path: str, pattern: str = DEFAULT_PATTERN) -> List[str]:
+    """
+    List the files in a directory tree that match a glob pattern.
+
+    The default pattern is served by an os.scandir walk, which filters on
+    the file name and reuses the directory entry's cached type instead of
+    stat-ing every path; other patterns fall back to Path.glob.
+
+    Args:
+        directory_path: Path to the directory
+        pattern: Glob pattern for files to return
+
+    Returns:
+        Paths of the matching files
+    """
+    if pattern != DEFAULT_PATTERN:
+        return [str(p) for p in Path(directory_path).glob(pattern) if p.is_file()]
+    return list(_walk_python_files(str(Path(directory_path))))
+
+
+def _walk_python_files(root: str) -> Iterator[str]:
+    """Yield the .py files below root, without following symlinked directories."""
+    try:
+        entries = os.scandir(root)
+    except OSError:
+        return
+    with entries:
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    yield from _walk_python_files(entry.path)
+                elif entry.name.endswith(".py") and entry.is_file():
+                    yield entry.path
+            except OSError:
+                continue
+
+
+# One splitter (and parser) per worker process, keyed by its constructor
+# arguments (small_file_threshold, use_tree_sitter)
+_worker_splitters: Dict[Tuple[int, bool], ASTCodeSplitter] = {}
+
+
+def _split_one(job: Tuple[str, Tuple[int, bool]]) -> List[CodeChunk]:
+    """Split a single file in a worker process (module-level so it can be pickled)."""
+    file_path, config = job
+    splitter = _worker_splitters.get(config)
+    if splitter is None:
+        splitter = _worker_splitters[config] = ASTCodeSplitter(*config)
+    return _split_or_warn(splitter, file_path)
+
+
+def _split_or_warn(splitter: ASTCodeSplitter, file_path: str) -> List[CodeChunk]:
+    """Split a file, reporting a failure and returning no chunks instead of raising."""
+    try:
+        return splitter.split_python_file(file_path)
+    except Exception:
+        logger.warning("Error processing %s", file_path, exc_info=True)
+        return []
+
+
+def _may_define(source) -> bool:
+    """
+    Cheaply check whether the source might contain a top-level def or class.
+
+    Top-level definitions start at column 0, so they either open the file or
+    follow a newline. False positives (e.g. a line starting with "default")
+    only cost a parse.
+    """
+    head = source[:16].lstrip(b'\xef\xbb\xbf')
+    return (
+        head.startswith((b'def', b'class'))
+        or source.find(b'\ndef') != -1
+        or source.find(b'\nclass') != -1
+    )
+
+
+def _definitions(parent) -> List[Any]:
+    """
+    Return the function and class definitions directly under a tree-sitter node.
+
+    Decorated definitions are unwrapped to the definition itself (so spans
+    start at the def/class line, as with ast), and async functions are
+    skipped to match the ast splitter, which only handles FunctionDef.
+    """
+    definitions = []
+    for node in parent.children:
+        if node.type == 'decorated_definition':
+            node = node.child_by_field_name('definition')
+        if node.type == 'class_definition':
+            definitions.append(node)
+        elif node.type == 'function_definition' and node.children[0].type != 'async':
+            definitions.append(node)
+    return definitions
+
+
+def _node_name(node, source) -> str:
+    """Return the identifier of a tree-sitter definition node."""
+    name_node = node.child_by_field_name('name')
+    return _decode(source[name_node.start_byte:name_node.end_byte])
+
+
+def _line_offsets(source) -> List[int]:
+    """Return the byte offset at which each line of the source starts."""
+    # One vectorized scan for newlines; the temporary view of the buffer is
+    # released before returning so a memory map can still be closed
+    newlines = np.flatnonzero(np.frombuffer(source, dtype=np.uint8) == 0x0A)
+    return [0] + (newlines + 1).tolist()
+
+
+def _slice_lines(source, line_offsets: List[int], start_line: int, end_line: int) -> str:
+    """Decode lines start_line..end_line (1-based, inclusive) without the final newline."""
+    start = line_offsets[start_line - 1]
+    stop = line_offsets[end_line] - 1 if end_line < len(line_offsets) else len(source)
+    if stop > start and source[stop - 1] == 0x0D:
+        # Drop the '\r' of a CRLF line ending
+        stop -= 1
+    return _decode(source[start:stop])
+
+
+def _decode(data: bytes) -> str:
+    """Decode source bytes the way text-mode open() would."""
+    return data.decode('utf-8').replace('\r\n', '\n')
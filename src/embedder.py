@@ -3,28 +3,287 @@ Embedding generator using E5 model for converting code into semantic vectors.
 """
 
 from typing import List, Union
-from sentence_transformers import SentenceTransformer
-import torch
+from pathlib import Path
+import functools
+import logging
+import os
+import numpy as np
+from .embedding_cache import EmbeddingCache, DEFAULT_CACHE_PATH
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ONNX_DIR = "~/.cache/logagent/onnx"
+
+
+def _cpu_threads() -> int:
+    """Number of CPUs this process may run on (respects affinity/cgroup pinning)."""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+@functools.cache
+def _load_sentence_transformer(model_name: str, device: str):
+    """
+    Load a SentenceTransformer once per process, prepared for the device.
+
+    sentence-transformers (and torch) are imported here rather than at module
+    level so that importing LogAgent stays cheap until a model is needed.
+
+    Args:
+        model_name: Name of the E5 model to use
+        device: Device to run the model on
+
+    Returns:
+        The loaded SentenceTransformer
+    """
+    from sentence_transformers import SentenceTransformer
+
+    model = SentenceTransformer(model_name, device=device)
+    if device == 'cpu':
+        import torch
+
+        # Use every available core for the forward pass
+        torch.set_num_threads(_cpu_threads())
+    elif device == 'cuda':
+        # fp16 runs on the tensor cores at twice the fp32 rate
+        model.half()
+        _compile_model(model)
+    return model
+
+
+def _compile_model(model):
+    """
+    Compile the transformer with torch.compile and warm it up.
+
+    Falls back to eager mode if compilation fails on this setup.
+    """
+    import torch
+
+    if not hasattr(torch, 'compile'):
+        return
+
+    transformer = model[0]
+    eager_model = transformer.auto_model
+    transformer.auto_model = torch.compile(eager_model, mode='reduce-overhead', dynamic=True)
+
+    try:
+        # The first calls trigger compilation; do them now rather than mid-indexing
+        model.encode(['warmup'] * 8, show_progress_bar=False)
+    except Exception:
+        logger.warning("torch.compile failed, using eager mode", exc_info=True)
+        transformer.auto_model = eager_model
 
 
 class E5Embedder:
     """Handles code embedding generation using E5 model."""
 
-    def __init__(self, model_name: str = "intfloat/e5-base-v2", device: str = None):
+    def __init__(
+        self,
+        model_name: str = "intfloat/e5-base-v2",
+        device: str = None,
+        use_onnx: bool = False,
+        onnx_cache_dir: str = DEFAULT_ONNX_DIR,
+        use_fastembed: bool = False
+    ):
         """
         Initialize the E5 embedder.
 
         Args:
             model_name: Name of the E5 model to use
             device: Device to run the model on ('cuda', 'cpu', or None for auto-detect)
+            use_onnx: Run the model with ONNX Runtime (int8-quantized on CPU)
+                instead of PyTorch. Requires `optimum[onnxruntime]`.
+            onnx_cache_dir: Directory where exported ONNX models are kept
+            use_fastembed: On CPU, run the model with fastembed's prequantized
+                ONNX weights when it supports `model_name`. Requires `fastembed`.
         """
         if device is None:
+            import torch
             device = 'cuda' if torch.cuda.is_available() else 'cpu'
 
-        print(f"Loading E5 model '{model_name}' on device: {device}")
-        self.model = SentenceTransformer(model_name, device=device)
+        self.model_name = model_name
         self.device = device
-        self.embedding_dim = self.model.get_sentence_embedding_dimension()
+        self.use_onnx = use_onnx
+        # Larger batches pay off on GPU; small ones keep CPU latency down
+        self.batch_size = 128 if device == 'cuda' else 16
+
+        # fastembed only targets CPU; the GPU keeps the PyTorch path
+        self.use_fastembed = use_fastembed and device == 'cpu' and self._load_fastembed_model(model_name)
+
+        if self.use_fastembed:
+            self.use_onnx = False
+        elif use_onnx:
+            print(f"Loading E5 model '{model_name}' with ONNX Runtime on device: {device}")
+            self._load_onnx_model(model_name, onnx_cache_dir)
+        else:
+            print(f"Loading E5 model '{model_name}' on device: {device}")
+            self.model = _load_sentence_transformer(model_name, device)
+            self.tokenizer = self.model.tokenizer
+            self.max_seq_length = self.model.max_seq_length
+            self.embedding_dim = self.model.get_sentence_embedding_dimension()
+
+    @property
+    def backend(self) -> str:
+        """
+        Name of the runtime and precision producing the embeddings.
+
+        Backends of the same model give slightly different vectors (int8
+        ONNX, fastembed, fp16 on CUDA), so caches keep them apart.
+        """
+        if self.use_fastembed:
+            return "fastembed"
+        if self.use_onnx:
+            return "onnx-fp32" if self.device == 'cuda' else "onnx-int8"
+        return "torch-fp16" if self.device == 'cuda' else "torch-fp32"
+
+    def _load_fastembed_model(self, model_name: str) -> bool:
+        """
+        Load the model with fastembed if it ships weights for it.
+
+        Args:
+            model_name: Name of the E5 model to use
+
+        Returns:
+            True if the model was loaded, False if fastembed does not support it
+        """
+        from fastembed import TextEmbedding
+
+        supported = {m['model']: m for m in TextEmbedding.list_supported_models()}
+        if model_name not in supported:
+            print(f"fastembed does not support '{model_name}', using sentence-transformers")
+            return False
+
+        print(f"Loading E5 model '{model_name}' with fastembed on device: cpu")
+        self._fe = TextEmbedding(model_name=model_name)
+        # fastembed tokenizes internally; batches are sorted by character length instead
+        self.tokenizer = None
+        self.max_seq_length = 512
+        self.embedding_dim = supported[model_name]['dim']
+        self.batch_size = 64
+        return True
+
+    def _load_onnx_model(self, model_name: str, onnx_cache_dir: str):
+        """
+        Export the model to ONNX (once) and open an ONNX Runtime session.
+
+        On CPU the exported model is dynamically quantized to int8.
+
+        Args:
+            model_name: Name of the E5 model to use
+            onnx_cache_dir: Directory where exported ONNX models are kept
+        """
+        import onnxruntime
+        from transformers import AutoConfig, AutoTokenizer
+
+        export_dir = Path(onnx_cache_dir).expanduser() / model_name.replace('/', '--')
+        model_file = export_dir / "model.onnx"
+        quantized_file = export_dir / "model_quantized.onnx"
+
+        if not model_file.exists():
+            from optimum.onnxruntime import ORTModelForFeatureExtraction
+
+            print(f"Exporting '{model_name}' to ONNX in {export_dir}")
+            ORTModelForFeatureExtraction.from_pretrained(
+                model_name, export=True
+            ).save_pretrained(export_dir)
+            AutoTokenizer.from_pretrained(model_name).save_pretrained(export_dir)
+
+        # int8 kernels only pay off on CPU; keep full precision for CUDA
+        quantize = self.device != 'cuda'
+        if quantize and not quantized_file.exists():
+            from optimum.onnxruntime import ORTQuantizer
+            from optimum.onnxruntime.configuration import AutoQuantizationConfig
+
+            print(f"Quantizing '{model_name}' to int8")
+            quantizer = ORTQuantizer.from_pretrained(export_dir, file_name=model_file.name)
+            quantizer.quantize(
+                save_dir=export_dir,
+                quantization_config=AutoQuantizationConfig.avx512_vnni(
+                    is_static=False, per_channel=False
+                )
+            )
+
+        provider = 'CUDAExecutionProvider' if self.device == 'cuda' else 'CPUExecutionProvider'
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = _cpu_threads()
+        self.session = onnxruntime.InferenceSession(
+            str(quantized_file if quantize else model_file),
+            sess_options=options,
+            providers=[provider]
+        )
+        self._session_inputs = {i.name for i in self.session.get_inputs()}
+        self.tokenizer = AutoTokenizer.from_pretrained(export_dir)
+
+        config = AutoConfig.from_pretrained(export_dir)
+        self.max_seq_length = min(self.tokenizer.model_max_length, config.max_position_embeddings)
+        self.embedding_dim = config.hidden_size
+
+    def _encode(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """
+        Encode texts into L2-normalized embeddings.
+
+        Args:
+            texts: Texts to encode (already prefixed)
+            batch_size: Number of texts per forward pass
+
+        Returns:
+            Array of shape (len(texts), embedding_dim)
+        """
+        batch_size = batch_size or self.batch_size
+
+        if self.use_fastembed:
+            embeddings = np.array(list(self._fe.embed(texts, batch_size=batch_size)), dtype=np.float32)
+            embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+            return embeddings
+
+        if not self.use_onnx:
+            embeddings = self.model.encode(
+                texts,
+                convert_to_numpy=True,
+                normalize_embeddings=True,
+                batch_size=batch_size,
+                show_progress_bar=False
+            )
+            # A half-precision model returns float16 arrays
+            return embeddings.astype(np.float32, copy=False)
+
+        batches = []
+        for i in range(0, len(texts), batch_size):
+            encoded = self.tokenizer(
+                texts[i:i + batch_size],
+                padding=True,
+                truncation=True,
+                max_length=self.max_seq_length,
+                return_tensors='np'
+            )
+            batches.append(self._run_onnx(encoded))
+
+        return np.vstack(batches)
+
+    def _run_onnx(self, encoded) -> np.ndarray:
+        """
+        Run one padded, tokenized batch through the ONNX session.
+
+        Args:
+            encoded: Tokenizer output with numpy arrays
+
+        Returns:
+            L2-normalized float32 embeddings of the batch
+        """
+        feeds = {
+            name: value.astype(np.int64)
+            for name, value in encoded.items()
+            if name in self._session_inputs
+        }
+        hidden = self.session.run(None, feeds)[0]
+
+        # Mean pooling over real tokens, then L2 normalization
+        mask = encoded['attention_mask'][..., None].astype(np.float32)
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled.astype(np.float32)
 
     def embed_code(self, code: str, prefix: str = "passage: ") -> List[float]:
         """
@@ -39,32 +298,78 @@ class E5Embedder:
         """
         # E5 models expect a prefix for better performance
         text = f"{prefix}{code}"
-        embedding = self.model.encode(text, convert_to_tensor=False, normalize_embeddings=True)
-        return embedding.tolist()
+        return self._encode([text])[0].tolist()
 
-    def embed_batch(self, codes: List[str], prefix: str = "passage: ") -> List[List[float]]:
+    def embed_batch(self, codes: List[str], prefix: str = "passage: ") -> np.ndarray:
         """
         Generate embeddings for multiple code snippets efficiently.
 
+        Inputs are encoded in length-sorted micro-batches (see
+        embed_batch_sorted); results are in the original input order.
+
         Args:
             codes: List of code strings to embed
             prefix: Prefix for the model
 
         Returns:
-            List of embedding vectors
+            Contiguous float32 array of shape (len(codes), dimension)
         """
         # Add prefix to all texts
-        texts = [f"{prefix}{code}" for code in codes]
-
-        embeddings = self.model.encode(
-            texts,
-            convert_to_tensor=False,
-            normalize_embeddings=True,
-            batch_size=32,
-            show_progress_bar=True
-        )
+        return self.embed_batch_sorted([f"{prefix}{code}" for code in codes])
+
+    def embed_batch_sorted(self, texts: List[str], batch_size: int = None) -> np.ndarray:
+        """
+        Embed texts in micro-batches of similar tokenized length.
+
+        Padding every sequence to the longest one in its batch wastes most
+        of the compute on a mixed batch, so texts are sorted by length,
+        encoded in consecutive slices, and put back in input order. With
+        ONNX Runtime the texts are tokenized once and each slice is only
+        padded.
+
+        Args:
+            texts: Texts to embed (already prefixed)
+            batch_size: Number of texts per forward pass
+
+        Returns:
+            Contiguous float32 array of shape (len(texts), dimension)
+        """
+        if not texts:
+            return np.empty((0, self.embedding_dim), dtype=np.float32)
+        batch_size = batch_size or self.batch_size
 
-        return embeddings.tolist()
+        # Sort by token length so batches contain similarly sized sequences
+        encoded = None
+        if self.use_onnx:
+            encoded = self.tokenizer(texts, truncation=True, max_length=self.max_seq_length)
+            lengths = [len(ids) for ids in encoded['input_ids']]
+        elif self.tokenizer is None:
+            lengths = [len(text) for text in texts]
+        else:
+            lengths = [
+                len(ids) for ids in self.tokenizer(
+                    texts,
+                    add_special_tokens=False,
+                    truncation=True,
+                    max_length=self.max_seq_length
+                )['input_ids']
+            ]
+        order = np.argsort(lengths, kind='stable')
+
+        if encoded is None:
+            embeddings = self._encode([texts[i] for i in order], batch_size=batch_size)
+        else:
+            features = [{key: encoded[key][i] for key in encoded.keys()} for i in order]
+            embeddings = np.vstack([
+                self._run_onnx(self.tokenizer.pad(features[i:i + batch_size], return_tensors='np'))
+                for i in range(0, len(features), batch_size)
+            ])
+
+        # Undo the length sort
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+
+        return np.ascontiguousarray(embeddings[inverse], dtype=np.float32)
 
     def embed_query(self, query: str) -> List[float]:
         """
@@ -78,9 +383,109 @@ class E5Embedder:
         """
         # For queries, E5 models use 'query:' prefix
         text = f"query: {query}"
-        embedding = self.model.encode(text, convert_to_tensor=False, normalize_embeddings=True)
-        return embedding.tolist()
+        return self._encode([text])[0].tolist()
 
     def get_embedding_dimension(self) -> int:
         """Get the dimension of the embedding vectors."""
         return self.embedding_dim
+
+
+class E5EmbedderONNX(E5Embedder):
+    """E5 embedder that always runs on ONNX Runtime (dynamic int8 quantization on CPU)."""
+
+    def __init__(
+        self,
+        model_name: str = "intfloat/e5-base-v2",
+        device: str = None,
+        onnx_cache_dir: str = DEFAULT_ONNX_DIR
+    ):
+        """
+        Initialize the ONNX E5 embedder.
+
+        The model is exported and quantized on first use and loaded from
+        onnx_cache_dir afterwards. Requires `optimum[onnxruntime]`.
+
+        Args:
+            model_name: Name of the E5 model to use
+            device: Device to run the model on ('cuda', 'cpu', or None for auto-detect)
+            onnx_cache_dir: Directory where exported ONNX models are kept
+        """
+        super().__init__(
+            model_name=model_name,
+            device=device,
+            use_onnx=True,
+            onnx_cache_dir=onnx_cache_dir
+        )
+
+
+class CachedE5Embedder(E5Embedder):
+    """E5 embedder that reuses vectors from a persistent on-disk cache."""
+
+    def __init__(
+        self,
+        model_name: str = "intfloat/e5-base-v2",
+        device: str = None,
+        cache_path: str = DEFAULT_CACHE_PATH,
+        use_onnx: bool = False,
+        onnx_cache_dir: str = DEFAULT_ONNX_DIR,
+        use_fastembed: bool = False
+    ):
+        """
+        Initialize the cached E5 embedder.
+
+        Args:
+            model_name: Name of the E5 model to use
+            device: Device to run the model on ('cuda', 'cpu', or None for auto-detect)
+            cache_path: Location of the embedding cache file
+            use_onnx: Run the model with ONNX Runtime instead of PyTorch
+            onnx_cache_dir: Directory where exported ONNX models are kept
+            use_fastembed: On CPU, run the model with fastembed when it supports it
+        """
+        super().__init__(
+            model_name=model_name,
+            device=device,
+            use_onnx=use_onnx,
+            onnx_cache_dir=onnx_cache_dir,
+            use_fastembed=use_fastembed
+        )
+        self.cache = EmbeddingCache(cache_path)
+        # Vectors of other backends of the same model must not be mixed in
+        self._cache_namespace = f"{self.model_name}\0{self.backend}"
+
+    def embed_code(self, code: str, prefix: str = "passage: ") -> List[float]:
+        """Generate embedding for a single code snippet, using the cache."""
+        return self.embed_batch([code], prefix=prefix)[0].tolist()
+
+    def embed_query(self, query: str) -> List[float]:
+        """Generate embedding for a search query, using the cache."""
+        return self.embed_batch([query], prefix="query: ")[0].tolist()
+
+    def embed_batch(self, codes: List[str], prefix: str = "passage: ") -> np.ndarray:
+        """
+        Generate embeddings for multiple code snippets, only running the model on cache misses.
+
+        Args:
+            codes: List of code strings to embed
+            prefix: Prefix for the model
+
+        Returns:
+            Contiguous float32 array of shape (len(codes), dimension), in input order
+        """
+        keys = [self.cache.make_key(f"{prefix}{code}", self._cache_namespace) for code in codes]
+        vectors = self.cache.get_many(keys)
+
+        embeddings = np.empty((len(codes), self.embedding_dim), dtype=np.float32)
+        misses = []
+        for i, key in enumerate(keys):
+            vector = vectors.get(key)
+            if vector is None:
+                misses.append(i)
+            else:
+                embeddings[i] = vector
+
+        if misses:
+            fresh = super().embed_batch([codes[i] for i in misses], prefix=prefix)
+            self.cache.put_many((keys[i], vector) for i, vector in zip(misses, fresh))
+            embeddings[misses] = fresh
+
+        return embeddings
@@ -0,0 +1,105 @@
+"""
+Persistent on-disk cache for embedding vectors, keyed by a hash of the embedded text.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+from pathlib import Path
+import sqlite3
+import threading
+import numpy as np
+from .hashing import content_digest
+
+
+DEFAULT_CACHE_PATH = "~/.cache/logagent/embeddings.sqlite"
+
+
+class EmbeddingCache:
+    """Stores embedding vectors as float16 blobs in a SQLite database."""
+
+    # SQLite limits the number of bound parameters per statement
+    _MAX_VARIABLES = 500
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH):
+        """
+        Open (or create) the embedding cache.
+
+        Args:
+            path: Location of the SQLite cache file
+        """
+        cache_path = Path(path).expanduser()
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = str(cache_path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings "
+            "(key BLOB PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def make_key(text: str, namespace: str = "") -> bytes:
+        """
+        Build the cache key for a piece of text.
+
+        Args:
+            text: The exact text passed to the model (including any prefix)
+            namespace: Separates entries of different models
+
+        Returns:
+            16-byte digest of the namespaced text
+        """
+        return content_digest(f"{namespace}\0{text}")
+
+    def get_many(self, keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+        """
+        Look up several keys at once.
+
+        Args:
+            keys: Cache keys to fetch
+
+        Returns:
+            Mapping of found keys to float32 vectors (missing keys are omitted)
+        """
+        found = {}
+        unique_keys = list(dict.fromkeys(keys))
+
+        with self._lock:
+            for i in range(0, len(unique_keys), self._MAX_VARIABLES):
+                batch = unique_keys[i:i + self._MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float16).astype(np.float32)
+
+        return found
+
+    def put_many(self, items: Iterable[Tuple[bytes, List[float]]]):
+        """
+        Store several vectors at once.
+
+        Args:
+            items: (key, vector) pairs to write
+        """
+        rows = [
+            (key, np.asarray(vector, dtype=np.float16).tobytes())
+            for key, vector in items
+        ]
+        if not rows:
+            return
+
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                rows
+            )
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self.conn.close()
@@ -0,0 +1,35 @@
+"""
+Fast content hashing for cache keys and chunk deduplication.
+"""
+
+import hashlib
+
+try:
+    from blake3 import blake3
+    BLAKE3_AVAILABLE = True
+except ImportError:
+    BLAKE3_AVAILABLE = False
+
+
+DIGEST_SIZE = 16
+
+
+def content_digest(data) -> bytes:
+    """
+    Hash a piece of content to a 16-byte digest.
+
+    Uses BLAKE3 (SIMD-accelerated) when the `blake3` package is installed and
+    BLAKE2b from the standard library otherwise. The two give different
+    digests, so keys persisted by one are not found by the other.
+
+    Args:
+        data: Text, bytes, or any buffer (such as a memory map)
+
+    Returns:
+        16-byte digest of the content
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    if BLAKE3_AVAILABLE:
+        return blake3(data).digest()[:DIGEST_SIZE]
+    return hashlib.blake2b(data, digest_size=DIGEST_SIZE).digest()
@@ -0,0 +1,121 @@
+"""
+Persistent record of indexed files, used to skip unchanged files when re-indexing.
+"""
+
+from typing import Dict, Iterable, List, Tuple
+from pathlib import Path
+import sqlite3
+import threading
+
+
+class IndexManifest:
+    """
+    Stores the content hash, mtime and chunk count of every indexed file in SQLite.
+
+    Point IDs are not recorded: a file's points are removed with a delete
+    filtered on their file_path payload (QdrantVectorDB.delete_by_files),
+    which also catches points a crashed run stored without recording them.
+    """
+
+    # SQLite limits the number of bound parameters per statement
+    _MAX_VARIABLES = 500
+
+    def __init__(self, path: str):
+        """
+        Open (or create) the manifest.
+
+        Args:
+            path: Location of the SQLite manifest file
+        """
+        manifest_path = Path(path).expanduser()
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+
+        self.path = str(manifest_path)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS files "
+            "(path TEXT PRIMARY KEY, hash TEXT NOT NULL, mtime REAL NOT NULL, chunks INTEGER NOT NULL)"
+        )
+        self.conn.commit()
+
+    def get_many(self, paths: List[str]) -> Dict[str, Tuple[str, float, int]]:
+        """
+        Look up several files at once.
+
+        Args:
+            paths: File paths to fetch
+
+        Returns:
+            Mapping of known paths to (hash, mtime, chunk count)
+        """
+        found = {}
+        with self._lock:
+            for i in range(0, len(paths), self._MAX_VARIABLES):
+                batch = paths[i:i + self._MAX_VARIABLES]
+                placeholders = ",".join("?" * len(batch))
+                rows = self.conn.execute(
+                    f"SELECT path, hash, mtime, chunks FROM files WHERE path IN ({placeholders})",
+                    batch
+                ).fetchall()
+                for path, digest, mtime, chunks in rows:
+                    found[path] = (digest, mtime, chunks)
+        return found
+
+    def update(self, entries: Iterable[Tuple[str, str, float, int]]):
+        """
+        Record several files in one transaction.
+
+        Args:
+            entries: (path, hash, mtime, chunk count) rows to write
+        """
+        rows = list(entries)
+        if not rows:
+            return
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, hash, mtime, chunks) VALUES (?, ?, ?, ?)",
+                rows
+            )
+
+    def remove(self, paths: Iterable[str]):
+        """
+        Forget several files in one transaction.
+
+        Args:
+            paths: File paths to drop
+        """
+        with self._lock, self.conn:
+            self.conn.executemany("DELETE FROM files WHERE path = ?", ((path,) for path in paths))
+
+    def paths_under(self, directory: str) -> List[str]:
+        """
+        List the recorded files below a directory.
+
+        Args:
+            directory: Directory prefix, ending with a path separator
+
+        Returns:
+            Recorded paths that start with the prefix
+        """
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT path FROM files WHERE substr(path, 1, ?) = ?",
+                (len(directory), directory)
+            ).fetchall()
+        return [path for path, in rows]
+
+    def clear(self):
+        """Forget every file (e.g. after the collection was recreated)."""
+        with self._lock, self.conn:
+            self.conn.execute("DELETE FROM files")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+
+    def close(self):
+        """Close the underlying database connection."""
+        with self._lock:
+            self.conn.close()
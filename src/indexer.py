@@ -2,21 +2,53 @@
 Code indexing pipeline that combines AST splitting, embedding, and vector storage.
 """
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
+from collections import defaultdict, OrderedDict
 from pathlib import Path
-from .code_splitter import ASTCodeSplitter, CodeChunk
+import asyncio
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+import numpy as np
+from .code_splitter import ASTCodeSplitter, CodeChunk, find_python_files
 from .embedder import E5Embedder
 from .vector_db import QdrantVectorDB
+from .hashing import content_digest
+from .semantic_cache import SemanticCache
+from .index_manifest import IndexManifest
+
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = ".logagent_manifest.sqlite"
+# Where manifests for Qdrant server collections are kept
+DEFAULT_MANIFEST_DIR = "~/.cache/logagent"
 
 
 class CodeIndexer:
     """Orchestrates the code indexing pipeline."""
 
+    # Distinct chunks per embedding call, points per Qdrant upsert, upserts
+    # in flight, and upserts allowed to queue before embedding pauses
+    EMBED_BATCH_SIZE = 256
+    UPSERT_BATCH_SIZE = 128
+    UPSERT_CONCURRENCY = 4
+    PIPELINE_DEPTH = 8
+    # Chunks above which an index run pauses HNSW indexing (see
+    # QdrantVectorDB.bulk_mode); smaller loads into a non-empty collection
+    # are indexed incrementally
+    BULK_MODE_MIN_CHUNKS = 10000
+
     def __init__(
         self,
         embedder: E5Embedder,
         vector_db: QdrantVectorDB,
-        splitter: ASTCodeSplitter = None
+        splitter: ASTCodeSplitter = None,
+        manifest_path: Optional[str] = None,
+        query_cache_size: int = 1024,
+        semantic_cache_threshold: Optional[float] = 0.95
     ):
         """
         Initialize the code indexer.
@@ -25,10 +57,96 @@ class CodeIndexer:
             embedder: E5 embedding model
             vector_db: Qdrant vector database
             splitter: AST code splitter (creates default if not provided)
+            manifest_path: SQLite file recording the content hash, mtime and
+                chunk count of every indexed file, so unchanged files are
+                skipped when re-indexing. Only meaningful for a persistent
+                database.
+            query_cache_size: Number of recent queries whose embeddings and
+                search results are kept in memory (0 disables caching)
+            semantic_cache_threshold: Cosine similarity at which a new query
+                reuses the results of an earlier one (None to only reuse
+                embeddings of identical query strings)
         """
         self.embedder = embedder
         self.vector_db = vector_db
         self.splitter = splitter or ASTCodeSplitter()
+        self.manifest = IndexManifest(manifest_path) if manifest_path else None
+
+        # Query string -> embedding, least recently used first
+        self.query_cache_size = query_cache_size
+        self._exact_cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+        self._exact_cache_lock = threading.Lock()
+        self._exact_hits = 0
+        self._exact_misses = 0
+        # Bumped whenever indexed data changes, so dependent caches can
+        # tell their entries are stale
+        self.index_version = 0
+        # Query embedding -> search results
+        self._semantic_cache = None
+        if query_cache_size and semantic_cache_threshold is not None:
+            self._semantic_cache = SemanticCache(
+                dim=embedder.get_embedding_dimension(),
+                capacity=query_cache_size,
+                threshold=semantic_cache_threshold
+            )
+
+    def _changed_files(self, file_paths: List[str]) -> Tuple[List[str], Dict[str, Tuple[str, float]], int]:
+        """
+        Split files into those that need indexing and those unchanged since the last run.
+
+        A file whose mtime matches the manifest is not read at all; one
+        that was touched but has the same content only gets its mtime
+        refreshed.
+
+        Args:
+            file_paths: Paths of the Python files
+
+        Returns:
+            (files to index, their (hash, mtime) stamps, chunk count of the skipped files)
+        """
+        if self.manifest is None:
+            return list(file_paths), {}, 0
+
+        known = self.manifest.get_many(list(file_paths))
+        to_index = []
+        stamps = {}
+        touched = []
+        cached_chunks = 0
+        for file_path in file_paths:
+            mtime = os.stat(file_path).st_mtime
+            entry = known.get(file_path)
+            if entry and entry[1] == mtime:
+                cached_chunks += entry[2]
+                continue
+
+            digest = content_digest(Path(file_path).read_bytes()).hex()
+            if entry and entry[0] == digest:
+                cached_chunks += entry[2]
+                touched.append((file_path, digest, mtime, entry[2]))
+            else:
+                to_index.append(file_path)
+                stamps[file_path] = (digest, mtime)
+
+        self.manifest.update(touched)
+        return to_index, stamps, cached_chunks
+
+    def _record_files(self, stamps: Dict[str, Tuple[str, float]], chunks_per_file: Dict[str, int]):
+        """Add freshly indexed files to the manifest in one transaction."""
+        if stamps:
+            self.manifest.update(
+                (file_path, *stamps[file_path], num_chunks)
+                for file_path, num_chunks in chunks_per_file.items()
+            )
+
+    def _forget_files(self, file_paths: List[str]):
+        """Delete the points of files that are about to be re-indexed or were removed."""
+        if self.manifest is None or not file_paths:
+            return
+        self._invalidate_search_cache()
+        # Every file, not only those in the manifest, so points of files from
+        # an interrupted run that never made it into the manifest go too
+        self.vector_db.delete_by_files(file_paths)
+        self.manifest.remove(file_paths)
 
     def index_file(self, file_path: str) -> int:
         """
@@ -40,63 +158,334 @@ class CodeIndexer:
         Returns:
             Number of chunks indexed
         """
-        print(f"Indexing file: {file_path}")
+        logger.debug("Indexing file: %s", file_path)
+
+        to_index, stamps, cached_chunks = self._changed_files([file_path])
+        if not to_index:
+            logger.debug("Unchanged since last index, skipping %s", file_path)
+            return cached_chunks
+        self._forget_files(to_index)
 
         # Split the file into chunks
         chunks = self.splitter.split_python_file(file_path)
 
         if not chunks:
-            print(f"No chunks extracted from {file_path}")
+            logger.debug("No chunks extracted from %s", file_path)
             return 0
 
-        # Generate embeddings
-        code_texts = [chunk.content for chunk in chunks]
-        embeddings = self.embedder.embed_batch(code_texts)
-
-        # Prepare metadata
-        metadatas = [chunk.get_metadata() for chunk in chunks]
+        self._index_chunks(chunks)
 
-        # Insert into vector database
-        self.vector_db.insert_batch(embeddings, metadatas)
+        self._record_files(stamps, {file_path: len(chunks)})
 
-        print(f"Indexed {len(chunks)} chunks from {file_path}")
+        logger.info("Indexed %d chunks from %s", len(chunks), file_path)
         return len(chunks)
 
-    def index_directory(self, directory_path: str, pattern: str = "**/*.py") -> int:
+    def index_files(self, file_paths: List[str], batch_size: int = EMBED_BATCH_SIZE) -> int:
+        """
+        Index several Python files, batching embeddings across files.
+
+        Chunks from all files are pooled, so each embedding call gets a full
+        batch instead of the handful of chunks a single file produces.
+
+        Args:
+            file_paths: Paths of the Python files
+            batch_size: Number of distinct chunks per embedding call
+
+        Returns:
+            Total number of chunks indexed
+        """
+        return asyncio.run(self.index_files_async(file_paths, batch_size=batch_size))
+
+    async def index_files_async(
+        self,
+        file_paths: List[str],
+        batch_size: int = EMBED_BATCH_SIZE,
+        upsert_batch_size: int = UPSERT_BATCH_SIZE,
+        concurrency: int = UPSERT_CONCURRENCY,
+        bulk_mode: Optional[bool] = None
+    ) -> int:
+        """
+        Index several Python files, overlapping embedding with Qdrant upserts.
+
+        Args:
+            file_paths: Paths of the Python files
+            batch_size: Number of distinct chunks per embedding call
+            upsert_batch_size: Number of points per upsert request
+            concurrency: Maximum number of upserts in flight
+            bulk_mode: Pause HNSW indexing while uploading (see
+                QdrantVectorDB.bulk_mode). By default only when the
+                collection is empty or at least BULK_MODE_MIN_CHUNKS chunks
+                changed.
+
+        Returns:
+            Total number of chunks indexed
+        """
+        # Only files that changed since the last run need indexing
+        file_paths = [str(file_path) for file_path in file_paths]
+        to_index, stamps, cached_chunks = await asyncio.to_thread(self._changed_files, file_paths)
+        if len(to_index) < len(file_paths):
+            logger.info("Skipping %d unchanged files (%d chunks)", len(file_paths) - len(to_index), cached_chunks)
+        await asyncio.to_thread(self._forget_files, to_index)
+
+        # Split files in worker processes, collecting chunks across files so
+        # duplicates are found and embedding batches span many files
+        chunks, chunks_per_file = await asyncio.to_thread(self._split_files, to_index)
+
+        unique = 0
+        if chunks:
+            if bulk_mode is None:
+                bulk_mode = len(chunks) >= self.BULK_MODE_MIN_CHUNKS or await asyncio.to_thread(self._collection_empty)
+            with self.vector_db.bulk_mode() if bulk_mode else contextlib.nullcontext():
+                unique = await self._index_chunks_async(
+                    chunks,
+                    batch_size=batch_size,
+                    upsert_batch_size=upsert_batch_size,
+                    concurrency=concurrency
+                )
+
+        if logger.isEnabledFor(logging.DEBUG):
+            for file_path, num_chunks in chunks_per_file.items():
+                logger.debug("Indexed %d chunks from %s", num_chunks, file_path)
+
+        await asyncio.to_thread(self._record_files, stamps, chunks_per_file)
+
+        logger.info("Total chunks indexed: %d (%d duplicates reused an embedding)", len(chunks), len(chunks) - unique)
+        return len(chunks) + cached_chunks
+
+    def _collection_empty(self) -> bool:
+        """Whether the collection holds no points yet (e.g. on a first index run)."""
+        return self.vector_db.get_collection_info().get("points_count") == 0
+
+    def _split_files(self, file_paths: List[str]) -> Tuple[List[CodeChunk], Dict[str, int]]:
+        """Split files in parallel, returning all chunks and the chunk count per file."""
+        if isinstance(self.splitter, ASTCodeSplitter):
+            results = self.splitter.iter_split(file_paths)
+        else:
+            # Any other object with split_python_file works too, in-process
+            results = ((file_path, self.splitter.split_python_file(file_path)) for file_path in file_paths)
+
+        chunks = []
+        chunks_per_file = {}
+        for file_path, file_chunks in results:
+            chunks_per_file[file_path] = len(file_chunks)
+            chunks.extend(file_chunks)
+        return chunks, chunks_per_file
+
+    def _index_chunks(self, chunks: List[CodeChunk]) -> int:
+        """Embed and store a list of chunks (see _index_chunks_async)."""
+        return asyncio.run(self._index_chunks_async(chunks))
+
+    async def _index_chunks_async(
+        self,
+        chunks: List[CodeChunk],
+        batch_size: int = EMBED_BATCH_SIZE,
+        upsert_batch_size: int = UPSERT_BATCH_SIZE,
+        concurrency: int = UPSERT_CONCURRENCY
+    ) -> int:
+        """
+        Embed and store a list of chunks, embedding identical content only once.
+
+        Every chunk still gets its own point; chunks sharing the same content
+        reuse one embedding and record the group size as ``duplicate_count``.
+
+        A producer embeds one batch of distinct contents at a time while
+        consumers upsert the points already embedded, so Qdrant write latency
+        hides behind the embedding forward pass. The bounded queue keeps at
+        most PIPELINE_DEPTH upsert batches in memory.
+
+        Args:
+            chunks: Chunks to index
+            batch_size: Number of distinct chunks per embedding call
+            upsert_batch_size: Number of points per upsert request
+            concurrency: Maximum number of upserts in flight
+
+        Returns:
+            Number of distinct contents that were embedded
+        """
+        self._invalidate_search_cache()
+
+        # Group chunk indices by a hash of their content
+        by_hash = defaultdict(list)
+        for i, chunk in enumerate(chunks):
+            by_hash[content_digest(chunk.content)].append(i)
+        groups = list(by_hash.values())
+
+        # Similar lengths side by side keep each embedding batch evenly padded
+        groups.sort(key=lambda group: len(chunks[group[0]].content))
+
+        queue = asyncio.Queue(maxsize=self.PIPELINE_DEPTH)
+        # A local (in-process) database is not safe for concurrent writers
+        num_consumers = 1 if self.vector_db.is_local else concurrency
+
+        async def produce():
+            for start in range(0, len(groups), batch_size):
+                batch = groups[start:start + batch_size]
+
+                # Generate one embedding per distinct content
+                unique_embeddings = await asyncio.to_thread(
+                    self.embedder.embed_batch,
+                    [chunks[group[0]].content for group in batch]
+                )
+
+                # Fan the embeddings back out to every chunk of the group
+                rows = []
+                metadatas = []
+                for row, group in enumerate(batch):
+                    for i in group:
+                        metadata = chunks[i].get_metadata()
+                        metadata["duplicate_count"] = len(group)
+                        rows.append(row)
+                        metadatas.append(metadata)
+                embeddings = unique_embeddings[rows]
+
+                for i in range(0, len(embeddings), upsert_batch_size):
+                    await queue.put((
+                        embeddings[i:i + upsert_batch_size],
+                        metadatas[i:i + upsert_batch_size]
+                    ))
+
+            for _ in range(num_consumers):
+                await queue.put(None)
+
+        async def consume():
+            while (item := await queue.get()) is not None:
+                embeddings, metadatas = item
+                # Insert into vector database
+                await asyncio.to_thread(
+                    self.vector_db.insert_batch,
+                    embeddings,
+                    metadatas,
+                    batch_size=upsert_batch_size,
+                    # Chunks re-sent after an interrupted run overwrite
+                    # their earlier copies instead of duplicating them
+                    use_content_hash=True
+                )
+
+        await asyncio.gather(produce(), *(consume() for _ in range(num_consumers)))
+        return len(groups)
+
+    def index_directory(
+        self,
+        directory_path: str,
+        pattern: str = "**/*.py",
+        bulk_mode: Optional[bool] = None
+    ) -> int:
         """
         Index all Python files in a directory.
 
         Args:
             directory_path: Path to the directory
             pattern: Glob pattern for files to index
+            bulk_mode: Pause HNSW indexing while uploading (see index_files_async)
+
+        Returns:
+            Total number of chunks indexed
+        """
+        return asyncio.run(self.index_directory_async(directory_path, pattern=pattern, bulk_mode=bulk_mode))
+
+    async def index_directory_async(
+        self,
+        directory_path: str,
+        pattern: str = "**/*.py",
+        batch_size: int = EMBED_BATCH_SIZE,
+        upsert_batch_size: int = UPSERT_BATCH_SIZE,
+        concurrency: int = UPSERT_CONCURRENCY,
+        bulk_mode: Optional[bool] = None
+    ) -> int:
+        """
+        Index all Python files in a directory from within an event loop.
+
+        The defaults (UPSERT_BATCH_SIZE points per upsert, UPSERT_CONCURRENCY
+        upserts in flight) are where single-node Qdrant ingestion throughput
+        levels off; raise them for a larger cluster.
+
+        Args:
+            directory_path: Path to the directory
+            pattern: Glob pattern for files to index
+            batch_size: Number of distinct chunks per embedding call
+            upsert_batch_size: Number of points per upsert request
+            concurrency: Maximum number of upserts in flight
+            bulk_mode: Pause HNSW indexing while uploading (see index_files_async)
 
         Returns:
             Total number of chunks indexed
         """
-        print(f"Indexing directory: {directory_path}")
+        # Resolved once, so manifest keys and file_path payloads are the same
+        # absolute paths whichever way the directory was named (and match
+        # codebase_key)
+        dir_path = Path(directory_path).resolve()
+        logger.info("Indexing directory: %s", dir_path)
 
-        dir_path = Path(directory_path)
-        total_chunks = 0
+        python_files = await asyncio.to_thread(find_python_files, str(dir_path), pattern)
+        logger.info("Found %d Python files", len(python_files))
 
-        python_files = list(dir_path.glob(pattern))
-        print(f"Found {len(python_files)} Python files")
+        # Drop the points of files that were deleted since the last run
+        if self.manifest is not None:
+            current = set(python_files)
+            known = await asyncio.to_thread(self.manifest.paths_under, str(dir_path) + os.sep)
+            removed = [p for p in known if p not in current]
+            if removed:
+                logger.info("Removing %d deleted files from the index", len(removed))
+                await asyncio.to_thread(self._forget_files, removed)
+
+        return await self.index_files_async(
+            python_files,
+            batch_size=batch_size,
+            upsert_batch_size=upsert_batch_size,
+            concurrency=concurrency,
+            bulk_mode=bulk_mode
+        )
+
+    def bulk_index_directory(self, directory_path: str, pattern: str = "**/*.py") -> int:
+        """
+        Index a directory with HNSW indexing paused for the duration of the upload.
+
+        Building the graph incrementally on every upsert dominates bulk
+        ingestion; with indexing disabled the points are only stored, and the
+        graph is built in one background pass once bulk mode ends. Only
+        worth it when many files changed; index_directory decides by itself.
+
+        Args:
+            directory_path: Path to the directory
+            pattern: Glob pattern for files to index
+
+        Returns:
+            Total number of chunks indexed
+        """
+        return self.index_directory(directory_path, pattern=pattern, bulk_mode=True)
+
+    def bulk_upload(
+        self,
+        embeddings: Union[np.ndarray, List[List[float]]],
+        metadatas: List[Dict[str, Any]],
+        batch_size: int = 256,
+        parallel: Optional[int] = None
+    ) -> List[str]:
+        """
+        Load precomputed embeddings with the parallel uploader and deferred indexing.
 
-        for file_path in python_files:
-            if file_path.is_file():
-                try:
-                    num_chunks = self.index_file(str(file_path))
-                    total_chunks += num_chunks
-                except Exception as e:
-                    print(f"Error indexing {file_path}: {e}")
+        Args:
+            embeddings: 2-D float32 array or list of embedding vectors
+            metadatas: Payload for each vector, in the same order
+            batch_size: Number of points per upload request
+            parallel: Number of upload processes (see QdrantVectorDB.upload_collection)
 
-        print(f"\nTotal chunks indexed: {total_chunks}")
-        return total_chunks
+        Returns:
+            IDs of the inserted points
+        """
+        self._invalidate_search_cache()
+        with self.vector_db.bulk_mode():
+            return self.vector_db.upload_collection(
+                embeddings, metadatas, batch_size=batch_size, parallel=parallel
+            )
 
     def search_similar_code(
         self,
         query: str,
         limit: int = 5,
-        score_threshold: float = 0.5
+        score_threshold: float = 0.5,
+        use_cache: bool = True,
+        query_vector: Optional[Union[List[float], np.ndarray]] = None
     ) -> List[Dict[str, Any]]:
         """
         Search for code chunks similar to a query.
@@ -105,12 +494,25 @@ class CodeIndexer:
             query: Search query (error log, description, etc.)
             limit: Maximum number of results
             score_threshold: Minimum similarity score
+            use_cache: Allow results cached for a similar query (the fresh
+                results are cached either way)
+            query_vector: Embedding of the query, if already computed
+                (e.g. by embed_queries)
 
         Returns:
             List of similar code chunks with metadata
         """
-        # Generate query embedding
-        query_vector = self.embedder.embed_query(query)
+        if query_vector is None:
+            query_vector = self.embed_query(query)
+        # One float32 array for the cache lookup, cache key and search
+        query_vector = np.asarray(query_vector, dtype=np.float32)
+
+        # Near-duplicate queries with the same parameters share results
+        search_params = (limit, score_threshold)
+        if self._semantic_cache is not None and use_cache:
+            cached = self._semantic_cache.get(query_vector, tag=search_params)
+            if cached is not None:
+                return list(cached)
 
         # Search in vector database
         results = self.vector_db.search(
@@ -119,10 +521,119 @@ class CodeIndexer:
             score_threshold=score_threshold
         )
 
+        if self._semantic_cache is not None:
+            self._semantic_cache.put(query_vector, list(results), tag=search_params)
+
         return results
 
+    def embed_query(self, query: str) -> Tuple[float, ...]:
+        """
+        Embed a query, reusing the embedding of an identical earlier query.
+
+        Args:
+            query: Search query
+
+        Returns:
+            Query embedding (a tuple, so cached vectors cannot be modified)
+        """
+        with self._exact_cache_lock:
+            query_vector = self._exact_cache.get(query)
+            if query_vector is not None:
+                self._exact_cache.move_to_end(query)
+                self._exact_hits += 1
+                return query_vector
+            self._exact_misses += 1
+
+        # Embed outside the lock so concurrent searches are not serialized
+        query_vector = tuple(self.embedder.embed_query(query))
+        if self.query_cache_size:
+            with self._exact_cache_lock:
+                self._exact_cache[query] = query_vector
+                if len(self._exact_cache) > self.query_cache_size:
+                    self._exact_cache.popitem(last=False)
+        return query_vector
+
+    def embed_queries(self, queries: List[str]) -> List[Tuple[float, ...]]:
+        """
+        Embed several queries, running the model once for all uncached ones.
+
+        Args:
+            queries: Search queries
+
+        Returns:
+            Query embeddings in input order
+        """
+        vectors: List[Optional[Tuple[float, ...]]] = [None] * len(queries)
+        with self._exact_cache_lock:
+            for i, query in enumerate(queries):
+                vector = self._exact_cache.get(query)
+                if vector is not None:
+                    self._exact_cache.move_to_end(query)
+                    self._exact_hits += 1
+                    vectors[i] = vector
+
+        # Distinct misses go through one length-sorted batch
+        misses = list(dict.fromkeys(q for q, v in zip(queries, vectors) if v is None))
+        if misses:
+            with self._exact_cache_lock:
+                self._exact_misses += len(misses)
+            fresh = dict(zip(misses, map(tuple, self.embedder.embed_batch(misses, prefix="query: ").tolist())))
+            if self.query_cache_size:
+                with self._exact_cache_lock:
+                    for query, vector in fresh.items():
+                        self._exact_cache[query] = vector
+                        if len(self._exact_cache) > self.query_cache_size:
+                            self._exact_cache.popitem(last=False)
+            vectors = [fresh[query] if vector is None else vector for query, vector in zip(queries, vectors)]
+
+        return vectors
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """
+        Return hit/miss counters of the query caches.
+
+        Returns:
+            Dictionary with 'embeddings' (identical query strings) and, when
+            enabled, 'results' (similar queries) counters
+        """
+        lookups = self._exact_hits + self._exact_misses
+        stats = {
+            "embeddings": {
+                "hits": self._exact_hits,
+                "misses": self._exact_misses,
+                "hit_rate": self._exact_hits / lookups if lookups else 0.0,
+                "size": len(self._exact_cache),
+            }
+        }
+        if self._semantic_cache is not None:
+            stats["results"] = self._semantic_cache.stats()
+        return stats
+
+    def _invalidate_search_cache(self):
+        """Forget cached search results once the indexed data changes."""
+        self.index_version += 1
+        if self._semantic_cache is not None:
+            self._semantic_cache.clear()
+
     def initialize_collection(self):
         """Initialize the vector database collection."""
         vector_size = self.embedder.get_embedding_dimension()
-        self.vector_db.create_collection(vector_size=vector_size)
-        print(f"Initialized collection with vector size: {vector_size}")
+        if self.vector_db.create_collection(vector_size=vector_size) and self.manifest is not None:
+            # A new collection holds none of the files the manifest lists
+            self.manifest.clear()
+        logger.info("Initialized collection with vector size: %d", vector_size)
+
+
+def codebase_key(codebase_path: str, model_name: str = "") -> str:
+    """
+    Identify the index of a codebase embedded with a given model.
+
+    Args:
+        codebase_path: Path to the codebase directory (or a single file)
+        model_name: Embedding model name, so indexes of different models differ
+
+    Returns:
+        Hex digest of the resolved path and model name
+    """
+    key = f"{model_name}\0{Path(codebase_path).resolve()}"
+    return hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
@@ -2,9 +2,84 @@
 LLM-powered code analysis using Claude API.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, AsyncIterator, Callable, Iterator, Optional, Tuple
+import asyncio
+import atexit
+import contextlib
+import io
+import json
 import os
-from anthropic import Anthropic
+import queue
+import re
+import threading
+from datetime import datetime
+from string import Template
+from anthropic import Anthropic, AsyncAnthropic
+from .semantic_cache import SemanticCache
+
+
+# Static instructions; identical for every request
+SYSTEM_PREAMBLE = """You are an expert software engineer analyzing error logs and providing actionable debugging advice.
+
+# Your Task
+
+Analyze the error summary provided by the user in the context of the actual code shown below and provide:
+
+1. **Root Cause Analysis**: What is causing this error?
+2. **Specific Location**: Which file, function, and line numbers are involved?
+3. **Explanation**: Why is this happening? What's the underlying issue?
+4. **Recommended Fix**: Provide specific, actionable steps to fix the issue
+5. **Code Suggestion**: If applicable, suggest actual code changes
+6. **Prevention**: How to prevent similar errors in the future
+
+Be specific, practical, and reference the actual file paths and code chunks provided below.
+"""
+
+# Retrieved code; sent as a second system block after the preamble
+_CONTEXT_HEADER = """# Relevant Code Context
+
+The following code chunks were identified as most relevant to this error using semantic vector search. These are the actual code snippets from the codebase that are most similar to the error:
+
+"""
+
+_CHUNK_TEMPLATE = Template("""
+## Relevant Code Chunk ${index} (Similarity: ${score})
+**File:** ${file_path}
+**Type:** ${chunk_type}
+**Name:** ${name}
+**Lines:** ${start_line}-${end_line}
+**Parent:** ${parent_context}
+
+```python
+${content}
+```
+""")
+
+# Trailing whitespace and runs of blank lines are stripped from chunk content
+_TRAILING_SPACE = re.compile(r"[ \t]+$", re.MULTILINE)
+_BLANK_LINES = re.compile(r"\n{3,}")
+
+# Fallbacks for metadata fields missing from a chunk
+_CHUNK_DEFAULTS = {
+    "file_path": "unknown",
+    "chunk_type": "unknown",
+    "name": "unknown",
+    "start_line": "?",
+    "end_line": "?",
+    "parent_context": "N/A",
+    "content": "# Code content not available",
+}
+
+_USER_TEMPLATE = Template("""# Error Summary
+
+The following error summary has been automatically extracted from the log file (showing only the key error lines):
+
+```
+${error_summary}
+```
+
+**Note**: This is a concise summary of the error, not the complete log file. It contains the most relevant error messages and tracebacks.
+""")
 
 
 class ClaudeAnalyzer:
@@ -17,7 +92,12 @@ class ClaudeAnalyzer:
         max_tokens: int = 2000,
         verbose: bool = False,
         save_prompts: bool = False,
-        prompts_dir: str = "./prompts"
+        prompts_dir: str = "./prompts",
+        enable_prompt_cache: bool = True,
+        embedder=None,
+        response_cache_size: int = 256,
+        response_cache_threshold: float = 0.92,
+        max_chunk_chars: int = 1500
     ):
         """
         Initialize Claude analyzer.
@@ -29,6 +109,15 @@ class ClaudeAnalyzer:
             verbose: If True, print prompts being sent to Claude
             save_prompts: If True, save prompts and responses to files
             prompts_dir: Directory to save prompts (default: ./prompts)
+            enable_prompt_cache: Let Claude cache the instructions and code context
+            embedder: Embedder used to recognize near-identical error summaries.
+                When given, responses are cached and reused for errors whose
+                summary embedding is at least response_cache_threshold similar
+                and whose retrieved code chunks are the same.
+            response_cache_size: Maximum number of cached responses
+            response_cache_threshold: Minimum cosine similarity for a cache hit
+            max_chunk_chars: Code longer than this is truncated in the prompt
+                (None keeps chunks whole)
         """
         self.api_key = api_key or os.environ.get("ANTHROPIC_API_KEY")
         if not self.api_key:
@@ -43,89 +132,453 @@ class ClaudeAnalyzer:
         self.verbose = verbose
         self.save_prompts = save_prompts
         self.prompts_dir = prompts_dir
+        self.enable_prompt_cache = enable_prompt_cache
+        self.max_chunk_chars = max_chunk_chars
         self.prompt_counter = 0
 
-        # Create prompts directory if needed
+        self.embedder = embedder
+        self.response_cache = None
+        if embedder is not None and response_cache_size:
+            self.response_cache = SemanticCache(
+                dim=embedder.get_embedding_dimension(),
+                capacity=response_cache_size,
+                threshold=response_cache_threshold
+            )
+        self.stats = {"requests": 0, "cache_hits": 0}
+
+        # Saved prompts are appended to one JSON-lines file by a background
+        # thread, so disk writes stay off the request path
+        self._timestamps: Dict[int, str] = {}
         if self.save_prompts:
-            import os
             os.makedirs(self.prompts_dir, exist_ok=True)
+            self.prompts_file = os.path.join(self.prompts_dir, "prompts.jsonl")
+            self._io_queue: "queue.Queue[Dict[str, Any]]" = queue.Queue()
+            threading.Thread(target=self._writer_loop, daemon=True).start()
+            atexit.register(self.flush)
 
     def analyze_error_with_context(
         self,
         error_summary: str,
         relevant_code: List[Dict[str, Any]],
-        num_context_chunks: int = 3
+        num_context_chunks: int = 3,
+        on_token: Optional[Callable[[str], None]] = None,
+        raise_errors: bool = False
     ) -> str:
         """
         Analyze error summary with code context using Claude.
 
+        The response is streamed, so on_token sees the first words within
+        about a second instead of after the whole answer is generated.
+
         Args:
             error_summary: Extracted error summary (key error lines only, NOT full log)
             relevant_code: List of relevant code chunks from vector search
             num_context_chunks: Number of code chunks to include in context
+            on_token: Called with each piece of text as Claude generates it
+            raise_errors: Re-raise a failed request instead of returning the
+                fallback message, so the caller can tell it from an analysis
 
         Returns:
             Detailed analysis and advice from Claude
         """
-        # Build context from relevant code
-        context_parts = []
-        for i, code_info in enumerate(relevant_code[:num_context_chunks], 1):
-            metadata = code_info['metadata']
-            score = code_info['score']
-
-            # Get the actual code content from metadata
-            code_content = metadata.get('content', '# Code content not available')
-
-            context_parts.append(
-                f"\n## Relevant Code Chunk {i} (Similarity: {score:.1%})\n"
-                f"**File:** {metadata.get('file_path', 'unknown')}\n"
-                f"**Type:** {metadata.get('chunk_type', 'unknown')}\n"
-                f"**Name:** {metadata.get('name', 'unknown')}\n"
-                f"**Lines:** {metadata.get('start_line', '?')}-{metadata.get('end_line', '?')}\n"
-                f"**Parent:** {metadata.get('parent_context', 'N/A')}\n"
-                f"\n```python\n"
-                f"{code_content}\n"
-                f"```\n"
-            )
+        cache_key, cached = self._lookup_response(error_summary, relevant_code, num_context_chunks)
+        if cached is not None:
+            if on_token:
+                on_token(cached)
+            return cached
+
+        context_prompt, user_prompt = self._build_prompt(
+            error_summary, relevant_code, num_context_chunks
+        )
+        prompt = f"{SYSTEM_PREAMBLE}\n{context_prompt}\n{user_prompt}"
+        request_id = self._start_request(prompt)
 
-        code_context = "\n".join(context_parts)
+        try:
+            # Call Claude API, collecting the response as it streams in
+            parts = []
+            with self.client.messages.stream(
+                **self._request_params(context_prompt, user_prompt)
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    if on_token:
+                        on_token(text)
+                message = stream.get_final_message()
+
+            response_text = "".join(parts)
+            self._finish_request(request_id, prompt, message, response_text)
+            self._store_response(cache_key, response_text)
+            return response_text
 
-        # Build the prompt for Claude
-        prompt = f"""You are an expert software engineer analyzing error logs and providing actionable debugging advice.
+        except Exception as e:
+            error_msg = self._fail_request(request_id, prompt, e)
+            if raise_errors:
+                raise
+            return error_msg
 
-# Error Summary
+    def analyze_error_with_context_stream(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int = 3
+    ) -> Iterator[str]:
+        """
+        Analyze error summary with code context, yielding the response as it is generated.
 
-The following error summary has been automatically extracted from the log file (showing only the key error lines):
+        Args:
+            error_summary: Extracted error summary (key error lines only, NOT full log)
+            relevant_code: List of relevant code chunks from vector search
+            num_context_chunks: Number of code chunks to include in context
 
-```
-{error_summary}
-```
+        Yields:
+            Pieces of Claude's analysis (or the fallback message on failure)
+        """
+        cache_key, cached = self._lookup_response(error_summary, relevant_code, num_context_chunks)
+        if cached is not None:
+            yield cached
+            return
+
+        context_prompt, user_prompt = self._build_prompt(
+            error_summary, relevant_code, num_context_chunks
+        )
+        prompt = f"{SYSTEM_PREAMBLE}\n{context_prompt}\n{user_prompt}"
+        request_id = self._start_request(prompt)
+
+        parts = []
+        try:
+            with self.client.messages.stream(
+                **self._request_params(context_prompt, user_prompt)
+            ) as stream:
+                for text in stream.text_stream:
+                    parts.append(text)
+                    yield text
+                message = stream.get_final_message()
+        except Exception as e:
+            yield ("\n\n" if parts else "") + self._fail_request(request_id, prompt, e)
+            return
 
-**Note**: This is a concise summary of the error, not the complete log file. It contains the most relevant error messages and tracebacks.
+        response_text = "".join(parts)
+        self._finish_request(request_id, prompt, message, response_text)
+        self._store_response(cache_key, response_text)
 
-# Relevant Code Context
+    def async_client(self) -> AsyncAnthropic:
+        """
+        Create an async Claude client to share between concurrent requests.
 
-The following code chunks were identified as most relevant to this error using semantic vector search. These are the actual code snippets from the codebase that are most similar to the error:
+        Use it as an async context manager so its connections are closed.
 
-{code_context}
+        Returns:
+            AsyncAnthropic client for this analyzer's API key
+        """
+        return AsyncAnthropic(api_key=self.api_key)
 
-# Your Task
+    async def aanalyze_error_with_context(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int = 3,
+        client: Optional[AsyncAnthropic] = None,
+        raise_errors: bool = False
+    ) -> str:
+        """
+        Async counterpart of analyze_error_with_context.
 
-Analyze this error summary in the context of the actual code shown above and provide:
+        Args:
+            error_summary: Extracted error summary (key error lines only, NOT full log)
+            relevant_code: List of relevant code chunks from vector search
+            num_context_chunks: Number of code chunks to include in context
+            client: Client from async_client() to reuse its connections
+                (a temporary one is created if omitted)
+            raise_errors: Re-raise a failed request instead of returning the
+                fallback message
 
-1. **Root Cause Analysis**: What is causing this error?
-2. **Specific Location**: Which file, function, and line numbers are involved?
-3. **Explanation**: Why is this happening? What's the underlying issue?
-4. **Recommended Fix**: Provide specific, actionable steps to fix the issue
-5. **Code Suggestion**: If applicable, suggest actual code changes
-6. **Prevention**: How to prevent similar errors in the future
+        Returns:
+            Detailed analysis and advice from Claude
+        """
+        if client is None:
+            async with self.async_client() as client:
+                return await self._analyze_error_async(
+                    client, None, error_summary, relevant_code, num_context_chunks, raise_errors
+                )
+        return await self._analyze_error_async(
+            client, None, error_summary, relevant_code, num_context_chunks, raise_errors
+        )
+
+    async def aanalyze_error_with_context_stream(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int = 3,
+        client: Optional[AsyncAnthropic] = None
+    ) -> AsyncIterator[str]:
+        """
+        Async counterpart of analyze_error_with_context_stream.
 
-Be specific, practical, and reference the actual file paths and code chunks provided above.
-"""
+        Args:
+            error_summary: Extracted error summary (key error lines only, NOT full log)
+            relevant_code: List of relevant code chunks from vector search
+            num_context_chunks: Number of code chunks to include in context
+            client: Client from async_client() to reuse its connections
+                (a temporary one is created if omitted)
 
+        Yields:
+            Pieces of Claude's analysis (or the fallback message on failure)
+        """
+        cache_key, cached = await self._alookup_response(
+            error_summary, relevant_code, num_context_chunks
+        )
+        if cached is not None:
+            yield cached
+            return
+
+        context_prompt, user_prompt = self._build_prompt(
+            error_summary, relevant_code, num_context_chunks
+        )
+        prompt = f"{SYSTEM_PREAMBLE}\n{context_prompt}\n{user_prompt}"
+        request_id = self._start_request(prompt)
+
+        parts = []
+        try:
+            async with contextlib.AsyncExitStack() as stack:
+                if client is None:
+                    client = await stack.enter_async_context(self.async_client())
+                async with client.messages.stream(
+                    **self._request_params(context_prompt, user_prompt)
+                ) as stream:
+                    async for text in stream.text_stream:
+                        parts.append(text)
+                        yield text
+                    message = await stream.get_final_message()
+        except Exception as e:
+            yield ("\n\n" if parts else "") + self._fail_request(request_id, prompt, e)
+            return
+
+        response_text = "".join(parts)
+        self._finish_request(request_id, prompt, message, response_text)
+        self._store_response(cache_key, response_text)
+
+    async def _analyze_error_async(
+        self,
+        client: AsyncAnthropic,
+        semaphore: Optional[asyncio.Semaphore],
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int = 3,
+        raise_errors: bool = False
+    ) -> str:
+        """Async counterpart of analyze_error_with_context, optionally bounded by a semaphore."""
+        cache_key, cached = await self._alookup_response(
+            error_summary, relevant_code, num_context_chunks
+        )
+        if cached is not None:
+            return cached
+
+        context_prompt, user_prompt = self._build_prompt(
+            error_summary, relevant_code, num_context_chunks
+        )
+        prompt = f"{SYSTEM_PREAMBLE}\n{context_prompt}\n{user_prompt}"
+        request_id = self._start_request(prompt)
+
+        try:
+            async with semaphore or contextlib.nullcontext():
+                message = await client.messages.create(
+                    **self._request_params(context_prompt, user_prompt)
+                )
+
+            response_text = message.content[0].text
+            self._finish_request(request_id, prompt, message, response_text)
+            self._store_response(cache_key, response_text)
+            return response_text
+
+        except Exception as e:
+            error_msg = self._fail_request(request_id, prompt, e)
+            if raise_errors:
+                raise
+            return error_msg
+
+    def _lookup_response(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int,
+        vector: Optional[Any] = None
+    ) -> Tuple[Optional[Tuple[Any, Tuple]], Optional[str]]:
+        """
+        Look for a cached response to a near-identical error with the same code context.
+
+        Args:
+            error_summary: Extracted error summary
+            relevant_code: List of relevant code chunks from vector search
+            num_context_chunks: Number of code chunks included in the prompt
+            vector: Embedding of error_summary, if already computed
+
+        Returns:
+            (cache key to store a fresh response under, cached response or None)
+        """
+        self.stats["requests"] += 1
+        if self.response_cache is None:
+            return None, None
+
+        # The summary is matched by similarity, the code chunks exactly
+        if vector is None:
+            vector = self.embedder.embed_query(error_summary)
+        chunk_ids = tuple(sorted(
+            str(code.get('id')) for code in self._select_chunks(relevant_code, num_context_chunks)
+        ))
+        cached = self.response_cache.get(vector, tag=chunk_ids)
+
+        if cached is not None:
+            self.stats["cache_hits"] += 1
+            if self.verbose:
+                print(f"♻️  Reusing cached Claude analysis for a similar error")
+        return (vector, chunk_ids), cached
+
+    async def _alookup_response(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int
+    ) -> Tuple[Optional[Tuple[Any, Tuple]], Optional[str]]:
+        """Async counterpart of _lookup_response that embeds the summary in a worker thread."""
+        vector = None
+        if self.response_cache is not None:
+            # Embedding is CPU-bound; keep it off the event loop so other
+            # analyses in the same gather keep making progress
+            vector = await asyncio.to_thread(self.embedder.embed_query, error_summary)
+        return self._lookup_response(error_summary, relevant_code, num_context_chunks, vector=vector)
+
+    def _store_response(self, cache_key: Optional[Tuple[Any, Tuple]], response_text: str):
+        """Cache a successful response under the key from _lookup_response."""
+        if cache_key is not None:
+            vector, chunk_ids = cache_key
+            self.response_cache.put(vector, response_text, tag=chunk_ids)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Return request counters for this analyzer.
+
+        Returns:
+            Dictionary with the number of analyses requested, the number served
+            from the response cache, and the resulting cache hit rate
+        """
+        requests = self.stats["requests"]
+        return {
+            **self.stats,
+            "cache_hit_rate": self.stats["cache_hits"] / requests if requests else 0.0,
+        }
+
+    def _build_prompt(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        num_context_chunks: int = 3
+    ) -> Tuple[str, str]:
+        """
+        Build the Claude prompt for an error summary and its code context.
+
+        The retrieved code is sent as a system block after SYSTEM_PREAMBLE so
+        that both form a cacheable prefix; only the error summary is sent as
+        the user message. The templates are compiled once at import time.
+
+        Args:
+            error_summary: Extracted error summary
+            relevant_code: List of relevant code chunks from vector search
+            num_context_chunks: Number of code chunks to include in context
+
+        Returns:
+            (code context prompt, user prompt) tuple
+        """
+        # Build context from relevant code in a single buffer
+        buf = io.StringIO()
+        buf.write(_CONTEXT_HEADER)
+        for i, code_info in enumerate(self._select_chunks(relevant_code, num_context_chunks), 1):
+            fields = {**_CHUNK_DEFAULTS, **code_info['metadata']}
+            if 'content' in code_info['metadata']:
+                fields["content"] = self._trim_content(fields["content"])
+            fields["index"] = i
+            fields["score"] = f"{code_info['score']:.1%}"
+            if i > 1:
+                buf.write("\n")
+            buf.write(_CHUNK_TEMPLATE.substitute(fields))
+        buf.write("\n")
+
+        context_prompt = buf.getvalue()
+        user_prompt = _USER_TEMPLATE.substitute(error_summary=error_summary)
+
+        return context_prompt, user_prompt
+
+    @staticmethod
+    def _select_chunks(relevant_code: List[Dict[str, Any]], num_context_chunks: int) -> List[Dict[str, Any]]:
+        """
+        Pick the code chunks to show Claude, skipping repeats of the same definition.
+
+        Args:
+            relevant_code: Code chunks from vector search, best first
+            num_context_chunks: Maximum number of chunks to return
+
+        Returns:
+            Up to num_context_chunks chunks with distinct (file_path, name)
+        """
+        selected = []
+        seen = set()
+        for code_info in relevant_code:
+            metadata = code_info['metadata']
+            key = (metadata.get('file_path'), metadata.get('name'))
+            if key in seen:
+                continue
+            seen.add(key)
+            selected.append(code_info)
+            if len(selected) == num_context_chunks:
+                break
+        return selected
+
+    def _trim_content(self, content: str) -> str:
+        """Strip redundant whitespace and truncate code to max_chunk_chars."""
+        content = _BLANK_LINES.sub("\n\n", _TRAILING_SPACE.sub("", content.rstrip()))
+        if self.max_chunk_chars and len(content) > self.max_chunk_chars:
+            content = content[:self.max_chunk_chars].rstrip() + "\n# ... (truncated)"
+        return content
+
+    def _request_params(self, context_prompt: str, user_prompt: str) -> Dict[str, Any]:
+        """
+        Build the keyword arguments for messages.create().
+
+        Args:
+            context_prompt: Code context
+            user_prompt: Error summary
+
+        Returns:
+            Request parameters
+        """
+        system = [
+            {"type": "text", "text": SYSTEM_PREAMBLE},
+            {"type": "text", "text": context_prompt}
+        ]
+        if self.enable_prompt_cache:
+            # One breakpoint after the code context, caching the preamble and
+            # context together for requests that retrieve the same code. The
+            # preamble alone is below the minimum cacheable prompt length, so
+            # a breakpoint after it would never be used.
+            system[-1]["cache_control"] = {"type": "ephemeral"}
+
+        return {
+            "model": self.model,
+            "max_tokens": self.max_tokens,
+            "system": system,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": user_prompt
+                }
+            ]
+        }
+
+    def _start_request(self, prompt: str) -> int:
+        """Number a new request and print its prompt if verbose."""
         # Increment counter for this request
         self.prompt_counter += 1
         request_id = self.prompt_counter
+        self._timestamps[request_id] = datetime.now().isoformat(timespec="seconds")
 
         # Print prompt if verbose mode
         if self.verbose:
@@ -140,119 +593,92 @@ Be specific, practical, and reference the actual file paths and code chunks prov
             print("=" * 80)
             print()
 
-        # Save prompt to file if enabled
-        if self.save_prompts:
-            from datetime import datetime
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            prompt_file = f"{self.prompts_dir}/prompt_{timestamp}_{request_id}.txt"
-
-            with open(prompt_file, 'w', encoding='utf-8') as f:
-                f.write(f"REQUEST #{request_id}\n")
-                f.write(f"Timestamp: {timestamp}\n")
-                f.write(f"Model: {self.model}\n")
-                f.write(f"Max tokens: {self.max_tokens}\n")
-                f.write("=" * 80 + "\n")
-                f.write("PROMPT:\n")
-                f.write("=" * 80 + "\n")
-                f.write(prompt)
-                f.write("\n\n")
+            print(f"⏳ Sending request to Claude API...")
+            print()
 
-        try:
-            # Call Claude API
-            if self.verbose:
-                print(f"⏳ Sending request to Claude API...")
-                print()
+        return request_id
 
-            message = self.client.messages.create(
-                model=self.model,
-                max_tokens=self.max_tokens,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": prompt
-                    }
-                ]
+    def _finish_request(self, request_id: int, prompt: str, message, response_text: str):
+        """Print Claude's response if verbose and queue the conversation to be saved."""
+        usage = {
+            "input_tokens": message.usage.input_tokens,
+            "output_tokens": message.usage.output_tokens,
+            "cache_read_input_tokens": getattr(message.usage, 'cache_read_input_tokens', 0) or 0,
+            "cache_creation_input_tokens": getattr(message.usage, 'cache_creation_input_tokens', 0) or 0,
+        }
+
+        # Print response if verbose mode
+        if self.verbose:
+            print("\n" + "=" * 80)
+            print(f"📥 RESPONSE FROM CLAUDE (Request #{request_id})")
+            print("=" * 80)
+            print(f"Response length: {len(response_text)} characters")
+            print(f"Tokens used: {usage['input_tokens']} input, {usage['output_tokens']} output")
+            print(
+                f"Prompt cache: {usage['cache_read_input_tokens']} read, "
+                f"{usage['cache_creation_input_tokens']} written"
             )
+            print("-" * 80)
+            print(response_text)
+            print("=" * 80)
+            print()
 
-            # Extract response
-            response_text = message.content[0].text
+        # Save the conversation if enabled
+        if self.save_prompts:
+            self._io_queue.put({
+                "id": request_id,
+                "timestamp": self._timestamps.pop(request_id, None),
+                "model": self.model,
+                "max_tokens": self.max_tokens,
+                "prompt": prompt,
+                "response": response_text,
+                "usage": usage,
+            })
 
-            # Print response if verbose mode
             if self.verbose:
-                print("\n" + "=" * 80)
-                print(f"📥 RESPONSE FROM CLAUDE (Request #{request_id})")
-                print("=" * 80)
-                print(f"Response length: {len(response_text)} characters")
-                print(f"Tokens used: {message.usage.input_tokens} input, {message.usage.output_tokens} output")
-                print("-" * 80)
-                print(response_text)
-                print("=" * 80)
+                print(f"💾 Saved conversation #{request_id} to: {self.prompts_file}")
                 print()
+        else:
+            self._timestamps.pop(request_id, None)
 
-            # Save response to file if enabled
-            if self.save_prompts:
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                response_file = f"{self.prompts_dir}/response_{timestamp}_{request_id}.txt"
-
-                with open(response_file, 'w', encoding='utf-8') as f:
-                    f.write(f"RESPONSE #{request_id}\n")
-                    f.write(f"Timestamp: {timestamp}\n")
-                    f.write(f"Model: {self.model}\n")
-                    f.write(f"Tokens: {message.usage.input_tokens} input, {message.usage.output_tokens} output\n")
-                    f.write("=" * 80 + "\n")
-                    f.write("RESPONSE:\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(response_text)
-                    f.write("\n")
-
-                # Also save a combined file
-                combined_file = f"{self.prompts_dir}/conversation_{timestamp}_{request_id}.txt"
-                with open(combined_file, 'w', encoding='utf-8') as f:
-                    f.write(f"CLAUDE API CONVERSATION #{request_id}\n")
-                    f.write(f"Timestamp: {timestamp}\n")
-                    f.write(f"Model: {self.model}\n")
-                    f.write("=" * 80 + "\n\n")
-                    f.write("PROMPT:\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(prompt)
-                    f.write("\n\n")
-                    f.write("=" * 80 + "\n")
-                    f.write("RESPONSE:\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(response_text)
-                    f.write("\n\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(f"TOKENS: {message.usage.input_tokens} input, {message.usage.output_tokens} output\n")
-
-                if self.verbose:
-                    print(f"💾 Saved conversation to: {combined_file}")
-                    print()
-
-            return response_text
-
-        except Exception as e:
-            error_msg = f"Error calling Claude API: {str(e)}\n\nFalling back to basic analysis..."
+    def _fail_request(self, request_id: int, prompt: str, e: Exception) -> str:
+        """Report a failed request and return the fallback message."""
+        error_msg = f"Error calling Claude API: {str(e)}\n\nFalling back to basic analysis..."
 
-            if self.verbose:
-                print("\n" + "=" * 80)
-                print(f"❌ ERROR (Request #{request_id})")
-                print("=" * 80)
-                print(error_msg)
-                print("=" * 80)
-                print()
-
-            if self.save_prompts:
-                from datetime import datetime
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                error_file = f"{self.prompts_dir}/error_{timestamp}_{request_id}.txt"
-                with open(error_file, 'w', encoding='utf-8') as f:
-                    f.write(f"ERROR #{request_id}\n")
-                    f.write(f"Timestamp: {timestamp}\n")
-                    f.write("=" * 80 + "\n")
-                    f.write(error_msg)
+        if self.verbose:
+            print("\n" + "=" * 80)
+            print(f"❌ ERROR (Request #{request_id})")
+            print("=" * 80)
+            print(error_msg)
+            print("=" * 80)
+            print()
 
-            return error_msg
+        timestamp = self._timestamps.pop(request_id, None)
+        if self.save_prompts:
+            self._io_queue.put({
+                "id": request_id,
+                "timestamp": timestamp,
+                "model": self.model,
+                "max_tokens": self.max_tokens,
+                "prompt": prompt,
+                "error": error_msg,
+            })
+
+        return error_msg
+
+    def _writer_loop(self):
+        """Append queued conversation records to the prompts file (runs in a daemon thread)."""
+        with open(self.prompts_file, 'a', encoding='utf-8') as f:
+            while True:
+                record = self._io_queue.get()
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+                f.flush()
+                self._io_queue.task_done()
+
+    def flush(self):
+        """Block until every queued conversation has been written to disk."""
+        if self.save_prompts:
+            self._io_queue.join()
 
     def generate_advice_summary(
         self,
@@ -271,38 +697,66 @@ Be specific, practical, and reference the actual file paths and code chunks prov
         Returns:
             Formatted advice string
         """
-        advice_parts = []
-
-        advice_parts.append("=" * 80)
-        advice_parts.append("AI-POWERED ERROR ANALYSIS (Claude)")
-        advice_parts.append("=" * 80)
-        advice_parts.append(f"\nConfidence Score: {confidence:.1%}")
-        advice_parts.append(f"\n{claude_analysis}")
-        advice_parts.append("\n" + "=" * 80)
-
-        return "\n".join(advice_parts)
+        rule = "=" * 80
+        return (
+            f"{rule}\n"
+            f"AI-POWERED ERROR ANALYSIS (Claude)\n"
+            f"{rule}\n"
+            f"\nConfidence Score: {confidence:.1%}\n"
+            f"\n{claude_analysis}\n"
+            f"\n{rule}"
+        )
 
     def batch_analyze(
         self,
         error_logs: List[str],
-        relevant_code_per_error: List[List[Dict[str, Any]]]
+        relevant_code_per_error: List[List[Dict[str, Any]]],
+        max_concurrency: int = 8
     ) -> List[str]:
         """
         Analyze multiple errors in batch.
 
+        Requests are sent concurrently, with at most max_concurrency in
+        flight at once to stay within API rate limits.
+
         Args:
             error_logs: List of error log texts
             relevant_code_per_error: List of relevant code chunks for each error
+            max_concurrency: Maximum number of simultaneous Claude requests
 
         Returns:
-            List of analysis results
+            List of analysis results (in input order)
         """
-        results = []
-        for error_log, relevant_code in zip(error_logs, relevant_code_per_error):
-            analysis = self.analyze_error_with_context(error_log, relevant_code)
-            results.append(analysis)
+        return asyncio.run(
+            self.abatch_analyze(error_logs, relevant_code_per_error, max_concurrency)
+        )
 
-        return results
+    async def abatch_analyze(
+        self,
+        error_logs: List[str],
+        relevant_code_per_error: List[List[Dict[str, Any]]],
+        max_concurrency: int = 8
+    ) -> List[str]:
+        """
+        Analyze multiple errors concurrently from within an event loop.
+
+        Each error gets its own Claude request; a semaphore keeps at most
+        max_concurrency of them in flight.
+
+        Args:
+            error_logs: List of error log texts
+            relevant_code_per_error: List of relevant code chunks for each error
+            max_concurrency: Maximum number of simultaneous Claude requests
+
+        Returns:
+            List of analysis results (in input order)
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        async with self.async_client() as client:
+            return await asyncio.gather(*[
+                self._analyze_error_async(client, semaphore, error_log, relevant_code)
+                for error_log, relevant_code in zip(error_logs, relevant_code_per_error)
+            ])
 
     def health_check(self) -> bool:
         """
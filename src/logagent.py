@@ -4,11 +4,13 @@ LogAgent - Main application for code analysis and error log feedback.
 
 from typing import Optional
 from pathlib import Path
+import atexit
 import os
 from .code_splitter import ASTCodeSplitter
-from .embedder import E5Embedder
+from .embedder import E5Embedder, CachedE5Embedder
+from .embedding_cache import DEFAULT_CACHE_PATH
 from .vector_db import QdrantVectorDB
-from .indexer import CodeIndexer
+from .indexer import CodeIndexer, MANIFEST_FILE, DEFAULT_MANIFEST_DIR
 from .query_interface import ErrorLogAnalyzer, AnalysisResult
 
 
@@ -19,12 +21,26 @@ class LogAgent:
         self,
         qdrant_host: str = "localhost",
         qdrant_port: int = 6333,
+        qdrant_grpc_port: int = 6334,
+        prefer_grpc: bool = True,
         collection_name: str = "code_chunks",
         use_memory_db: bool = False,
+        qdrant_path: Optional[str] = None,
+        quantization: Optional[str] = "scalar",
+        search_profile: str = "balanced",
+        redis_url: Optional[str] = None,
+        float16_vectors: bool = True,
+        index_manifest: bool = True,
+        query_cache_path: Optional[str] = None,
         embedding_model: str = "intfloat/e5-base-v2",
+        use_embedding_cache: bool = True,
+        embedding_cache_path: str = DEFAULT_CACHE_PATH,
+        use_onnx: bool = False,
+        use_fastembed: bool = False,
         use_llm: bool = True,
         anthropic_api_key: Optional[str] = None,
         claude_model: str = "claude-sonnet-4-20250514",
+        enable_prompt_cache: bool = True,
         verbose: bool = False,
         save_prompts: bool = False,
         prompts_dir: str = "./prompts"
@@ -34,13 +50,31 @@ class LogAgent:
 
         Args:
             qdrant_host: Qdrant server host
-            qdrant_port: Qdrant server port
+            qdrant_port: Qdrant server REST port
+            qdrant_grpc_port: Qdrant server gRPC port
+            prefer_grpc: Talk to the Qdrant server over gRPC rather than REST
             collection_name: Name of the vector collection
             use_memory_db: Use in-memory database (for testing)
+            qdrant_path: Use a local database persisted in this directory
+            quantization: Quantized vectors kept in RAM for faster search
+                ('scalar' for int8, 'binary' for 1-bit, or None)
+            search_profile: Search speed/recall preset ('fast', 'balanced' or 'recall-max')
+            redis_url: Share cached search results between processes through
+                this Redis server (requires `redis`)
+            float16_vectors: Store vectors as float16 in Qdrant (half the memory)
+            index_manifest: With a persistent database, skip files that are
+                unchanged since they were last indexed
+            query_cache_path: Load cached analyses of earlier runs from this
+                file and save them back on exit
             embedding_model: Name of the embedding model to use
+            use_embedding_cache: Reuse code and query embeddings from a persistent on-disk cache
+            embedding_cache_path: Location of the embedding cache file
+            use_onnx: Run the embedding model with ONNX Runtime (int8 on CPU)
+            use_fastembed: On CPU, run the embedding model with fastembed if it supports it
             use_llm: Whether to use Claude for intelligent analysis (default: True)
             anthropic_api_key: Anthropic API key (or set ANTHROPIC_API_KEY env var)
             claude_model: Claude model to use
+            enable_prompt_cache: Let Claude cache the instructions and code context
             verbose: If True, print prompts sent to Claude and responses
             save_prompts: If True, save prompts and responses to files
             prompts_dir: Directory to save prompts (default: ./prompts)
@@ -48,18 +82,46 @@ class LogAgent:
         print("Initializing LogAgent...")
 
         # Initialize components
-        self.embedder = E5Embedder(model_name=embedding_model)
+        if use_embedding_cache:
+            self.embedder = CachedE5Embedder(
+                model_name=embedding_model,
+                cache_path=embedding_cache_path,
+                use_onnx=use_onnx,
+                use_fastembed=use_fastembed
+            )
+        else:
+            self.embedder = E5Embedder(
+                model_name=embedding_model,
+                use_onnx=use_onnx,
+                use_fastembed=use_fastembed
+            )
         self.vector_db = QdrantVectorDB(
             host=qdrant_host,
             port=qdrant_port,
+            grpc_port=qdrant_grpc_port,
+            prefer_grpc=prefer_grpc,
             collection_name=collection_name,
-            use_memory=use_memory_db
+            use_memory=use_memory_db,
+            path=qdrant_path,
+            quantization=quantization,
+            vector_datatype="float16" if float16_vectors else None,
+            search_profile=search_profile,
+            redis_url=redis_url
         )
         self.splitter = ASTCodeSplitter()
+
+        # Remember what is already indexed, next to the data it describes
+        manifest_path = None
+        if index_manifest and qdrant_path:
+            manifest_path = str(Path(qdrant_path) / MANIFEST_FILE)
+        elif index_manifest and not use_memory_db:
+            manifest_path = f"{DEFAULT_MANIFEST_DIR}/manifest-{qdrant_host}-{qdrant_port}-{collection_name}.sqlite"
+
         self.indexer = CodeIndexer(
             embedder=self.embedder,
             vector_db=self.vector_db,
-            splitter=self.splitter
+            splitter=self.splitter,
+            manifest_path=manifest_path
         )
 
         # Initialize LLM analyzer if requested
@@ -75,6 +137,8 @@ class LogAgent:
                     self.llm_analyzer = ClaudeAnalyzer(
                         api_key=api_key,
                         model=claude_model,
+                        enable_prompt_cache=enable_prompt_cache,
+                        embedder=self.embedder,
                         verbose=verbose,
                         save_prompts=save_prompts,
                         prompts_dir=prompts_dir
@@ -97,6 +161,14 @@ class LogAgent:
             llm_analyzer=self.llm_analyzer
         )
 
+        # Warm start: near-identical error logs from earlier runs reuse their
+        # analysis until the index changes
+        if query_cache_path:
+            loaded = self.analyzer.load_cache(query_cache_path)
+            if loaded:
+                print(f"✓ Loaded {loaded} cached analyses")
+            atexit.register(self.analyzer.save_cache, query_cache_path)
+
         print("LogAgent initialized successfully!")
 
     def setup(self):
@@ -123,6 +195,8 @@ class LogAgent:
         if path.is_file():
             return self.indexer.index_file(str(path))
         else:
+            # Pauses HNSW indexing only for a first or large run, see
+            # CodeIndexer.index_files_async
             return self.indexer.index_directory(str(path), pattern=pattern)
 
     def analyze_error_log(
@@ -188,7 +262,7 @@ class LogAgent:
             show_report=show_report
         )
 
-    def search_code(self, query: str, limit: int = 5, min_score: float = 0.5):
+    def search_code(self, query: str, limit: int = 5, min_score: float = 0.5, show_results: bool = True):
         """
         Search for code relevant to a query.
 
@@ -196,6 +270,7 @@ class LogAgent:
             query: Search query
             limit: Maximum number of results
             min_score: Minimum similarity score
+            show_results: Whether to print the results
 
         Returns:
             List of relevant code chunks
@@ -206,13 +281,18 @@ class LogAgent:
             score_threshold=min_score
         )
 
-        print(f"\nFound {len(results)} relevant code chunks:\n")
-        for i, result in enumerate(results, 1):
-            metadata = result['metadata']
-            print(f"{i}. {metadata.get('name', 'unknown')} ({result['score']:.2%} match)")
-            print(f"   File: {metadata.get('file_path', 'unknown')}")
-            print(f"   Type: {metadata.get('chunk_type', 'unknown')}")
-            print(f"   Lines: {metadata.get('start_line', '?')}-{metadata.get('end_line', '?')}\n")
+        if show_results:
+            # Format everything first and write it with a single print
+            lines = [f"\nFound {len(results)} relevant code chunks:\n"]
+            for i, result in enumerate(results, 1):
+                metadata = result['metadata']
+                lines.append(
+                    f"{i}. {metadata.get('name', 'unknown')} ({result['score']:.2%} match)\n"
+                    f"   File: {metadata.get('file_path', 'unknown')}\n"
+                    f"   Type: {metadata.get('chunk_type', 'unknown')}\n"
+                    f"   Lines: {metadata.get('start_line', '?')}-{metadata.get('end_line', '?')}\n"
+                )
+            print("\n".join(lines))
 
         return results
 
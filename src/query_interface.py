@@ -2,9 +2,15 @@
 Query interface for error log analysis and code advice.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, NamedTuple, Optional, Tuple
 from dataclasses import dataclass
+import asyncio
+import contextlib
+import copy
+import itertools
+import re
 from .indexer import CodeIndexer
+from .semantic_cache import QueryCache
 
 
 @dataclass
@@ -17,26 +23,131 @@ class AnalysisResult:
     used_llm: bool = False
 
 
+class CodeHit(NamedTuple):
+    """Display fields of one search result, with defaults for missing metadata."""
+    score: float
+    name: Any = 'unknown'
+    file_path: Any = 'unknown'
+    chunk_type: Any = 'unknown'
+    start_line: Any = '?'
+    end_line: Any = '?'
+
+    @classmethod
+    def from_result(cls, result: Dict[str, Any]) -> "CodeHit":
+        """Read the fields of a search result (as returned by search_similar_code) once."""
+        metadata = result['metadata']
+        return cls(
+            result['score'],
+            metadata.get('name', 'unknown'),
+            metadata.get('file_path', 'unknown'),
+            metadata.get('chunk_type', 'unknown'),
+            metadata.get('start_line', '?'),
+            metadata.get('end_line', '?')
+        )
+
+
 class ErrorLogAnalyzer:
     """Analyzes error logs and provides code-based advice."""
 
-    def __init__(self, indexer: CodeIndexer, llm_analyzer=None):
+    # A log line containing one of the common error indicators
+    _ERROR_LINE = re.compile(r'^.*(?:Error:|Exception:|Traceback|ERROR|FATAL).*$', re.MULTILINE)
+
+    # Rule-based tips per error type, in order of precedence
+    _ERROR_ADVICE = {
+        'AttributeError': ("Check for None values or missing attributes", "Verify object initialization"),
+        'KeyError': ("Validate dictionary keys before access", "Use .get() method with defaults"),
+        'TypeError': ("Check function argument types", "Verify data type conversions"),
+        'ImportError': ("Verify package installation", "Check import paths"),
+        'ModuleNotFoundError': ("Verify package installation", "Check import paths"),
+    }
+    _DEFAULT_ADVICE = ("Review the relevant code sections", "Check for edge cases and error handling")
+    _ERROR_TYPE = re.compile('|'.join(map(re.escape, _ERROR_ADVICE)))
+
+    def __init__(
+        self,
+        indexer: CodeIndexer,
+        llm_analyzer=None,
+        cache_size: int = 256,
+        cache_threshold: float = 0.95
+    ):
         """
         Initialize the error log analyzer.
 
         Args:
             indexer: Code indexer with access to the codebase
             llm_analyzer: Optional LLM analyzer (e.g., ClaudeAnalyzer) for intelligent advice
+            cache_size: Number of analyses kept for reuse by near-identical
+                error logs (0 disables the cache)
+            cache_threshold: Initial cosine similarity at which an error log
+                reuses an earlier analysis; adapts as hits are verified
         """
         self.indexer = indexer
         self.llm_analyzer = llm_analyzer
         self.use_llm = llm_analyzer is not None
 
+        self.cache = None
+        if cache_size:
+            self.cache = QueryCache(
+                dim=indexer.embedder.get_embedding_dimension(),
+                capacity=cache_size,
+                threshold=cache_threshold
+            )
+
+    def save_cache(self, path: str) -> int:
+        """
+        Save the cached analyses of the current index for load_cache in a later run.
+
+        Args:
+            path: Snapshot file to (over)write
+
+        Returns:
+            Number of analyses saved
+        """
+        if self.cache is None:
+            return 0
+        version = self.indexer.index_version
+        # Index versions are per process; save analyses of the current one
+        # and record whether they used Claude instead
+        return self.cache.save(
+            path,
+            retag=lambda tag: (tag[0], tag[1], self.use_llm) if tag[2] == version else None,
+            keep=self._reusable
+        )
+
+    def load_cache(self, path: str) -> int:
+        """
+        Warm the cache with analyses saved by save_cache.
+
+        Call it before the index changes: entries are attached to the
+        current index version, so re-indexing makes them unreachable.
+
+        Args:
+            path: Snapshot file to read (a missing file loads nothing)
+
+        Returns:
+            Number of analyses loaded
+        """
+        if self.cache is None:
+            return 0
+        version = self.indexer.index_version
+        return self.cache.load(
+            path,
+            retag=lambda tag: (tag[0], tag[1], version) if tag[2] == self.use_llm else None,
+            keep=self._reusable
+        )
+
+    def _reusable(self, result: AnalysisResult) -> bool:
+        """Whether a cached analysis is worth keeping across runs (not a failed Claude request)."""
+        # Fallback advice is never cached now, but older snapshots may hold
+        # ClaudeAnalyzer's error message as an analysis
+        return result.used_llm == self.use_llm and not result.advice.startswith("Error calling Claude API")
+
     def analyze_error(
         self,
         error_log: str,
         num_results: int = 5,
-        min_score: float = 0.3
+        min_score: float = 0.3,
+        query_vector: Optional[List[float]] = None
     ) -> AnalysisResult:
         """
         Analyze an error log and provide advice.
@@ -45,42 +156,187 @@ class ErrorLogAnalyzer:
             error_log: The error log text
             num_results: Number of relevant code chunks to retrieve
             min_score: Minimum similarity score for relevance
+            query_vector: Embedding of the error log, if already computed
 
         Returns:
             AnalysisResult with analysis and advice
         """
+        query_vector = self._query_vector(error_log, query_vector)
+        cache_key, cached = self._cache_lookup(query_vector, num_results, min_score)
+        if cached is not None and not self.cache.should_verify():
+            return copy.deepcopy(cached)
+
         # Extract key information from error log
         error_summary = self._extract_error_summary(error_log)
 
         # Search for relevant code
-        relevant_code = self.indexer.search_similar_code(
-            query=error_log,
-            limit=num_results,
-            score_threshold=min_score
-        )
+        relevant_code, reuse = self._search_code(error_log, query_vector, num_results, min_score, cached)
+        if reuse is not None:
+            return copy.deepcopy(reuse)
 
         # Generate advice based on relevant code
         if self.use_llm and self.llm_analyzer:
             # Use LLM for intelligent analysis
             # Only send error summary to LLM, not the entire log file
-            advice = self._generate_llm_advice(error_summary, relevant_code)
-            used_llm = True
+            advice, used_llm = self._generate_llm_advice(error_summary, relevant_code)
         else:
             # Fall back to rule-based advice
             advice = self._generate_advice(error_log, relevant_code)
             used_llm = False
 
-        # Calculate confidence
-        confidence = self._calculate_confidence(relevant_code)
+        # A failed Claude request falls back to rule-based advice, which is
+        # not worth reusing once Claude is reachable again
+        cacheable = used_llm or not self.use_llm
+        return self._finish_result(
+            cache_key if cacheable else None, error_summary, relevant_code, advice, used_llm
+        )
+
+    async def aanalyze_error(
+        self,
+        error_log: str,
+        num_results: int = 5,
+        min_score: float = 0.3,
+        client=None,
+        query_vector: Optional[List[float]] = None
+    ) -> AnalysisResult:
+        """
+        Analyze an error log from within an event loop.
+
+        Embedding and search run in a worker thread and the Claude request
+        is awaited, so many analyses can be in flight at once.
+
+        Args:
+            error_log: The error log text
+            num_results: Number of relevant code chunks to retrieve
+            min_score: Minimum similarity score for relevance
+            client: Async Claude client to reuse (see ClaudeAnalyzer.async_client)
+            query_vector: Embedding of the error log, if already computed
+
+        Returns:
+            AnalysisResult with analysis and advice
+        """
+        if query_vector is None:
+            query_vector = await asyncio.to_thread(self._query_vector, error_log, None)
+        cache_key, cached = self._cache_lookup(query_vector, num_results, min_score)
+        if cached is not None and not self.cache.should_verify():
+            return copy.deepcopy(cached)
+
+        error_summary = self._extract_error_summary(error_log)
+
+        relevant_code, reuse = await asyncio.to_thread(
+            self._search_code, error_log, query_vector, num_results, min_score, cached
+        )
+        if reuse is not None:
+            return copy.deepcopy(reuse)
+
+        if self.use_llm and self.llm_analyzer:
+            advice, used_llm = await self._agenerate_llm_advice(error_summary, relevant_code, client)
+        else:
+            advice = self._generate_advice(error_log, relevant_code)
+            used_llm = False
+
+        # A failed Claude request falls back to rule-based advice, which is
+        # not worth reusing once Claude is reachable again
+        cacheable = used_llm or not self.use_llm
+        return self._finish_result(
+            cache_key if cacheable else None, error_summary, relevant_code, advice, used_llm
+        )
+
+    def _query_vector(self, error_log: str, query_vector: Optional[List[float]]) -> Optional[List[float]]:
+        """Embed the error log if the cache needs it and no embedding was given."""
+        if query_vector is None and self.cache is not None:
+            query_vector = self.indexer.embed_query(error_log)
+        return query_vector
+
+    def _cache_lookup(
+        self,
+        query_vector: Optional[List[float]],
+        num_results: int,
+        min_score: float
+    ) -> Tuple[Optional[Tuple[Any, Tuple]], Optional[AnalysisResult]]:
+        """
+        Look for the analysis of a near-identical error log.
+
+        Args:
+            query_vector: Embedding of the error log
+            num_results: Number of relevant code chunks to retrieve
+            min_score: Minimum similarity score for relevance
 
-        return AnalysisResult(
+        Returns:
+            (cache key to store a fresh result under, cached result or None)
+        """
+        if self.cache is None:
+            return None, None
+
+        # The index version is part of the tag, so re-indexing makes older
+        # analyses unreachable
+        tag = (num_results, min_score, self.indexer.index_version)
+        return (query_vector, tag), self.cache.get(query_vector, tag=tag)
+
+    def _search_code(
+        self,
+        error_log: str,
+        query_vector: Optional[List[float]],
+        num_results: int,
+        min_score: float,
+        cached: Optional[AnalysisResult]
+    ) -> Tuple[List[Dict[str, Any]], Optional[AnalysisResult]]:
+        """
+        Search for code relevant to an error log, verifying a cache hit if given.
+
+        Args:
+            error_log: The error log text
+            query_vector: Embedding of the error log (computed if None)
+            num_results: Number of relevant code chunks to retrieve
+            min_score: Minimum similarity score for relevance
+            cached: Cache hit being spot-checked, if any
+
+        Returns:
+            (relevant code, the cached result if it retrieved the same code)
+        """
+        relevant_code = self.indexer.search_similar_code(
+            query=error_log,
+            limit=num_results,
+            score_threshold=min_score,
+            use_cache=cached is None,
+            query_vector=query_vector
+        )
+
+        if cached is not None:
+            # A hit retrieving the same code is trusted (and the threshold
+            # relaxed), otherwise the error is analyzed afresh
+            agreed = _result_ids(cached.relevant_code) == _result_ids(relevant_code)
+            self.cache.record_verification(agreed)
+            if agreed:
+                return relevant_code, cached
+
+        return relevant_code, None
+
+    def _finish_result(
+        self,
+        cache_key: Optional[Tuple[Any, Tuple]],
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        advice: str,
+        used_llm: bool
+    ) -> AnalysisResult:
+        """Build the AnalysisResult and cache it under the key from _cache_lookup."""
+        result = AnalysisResult(
             error_summary=error_summary,
             relevant_code=relevant_code,
             advice=advice,
-            confidence=confidence,
+            confidence=self._calculate_confidence(relevant_code),
             used_llm=used_llm
         )
 
+        if cache_key is not None:
+            query_vector, tag = cache_key
+            # Callers get their own copy of a cached analysis (see
+            # analyze_error), so mutating one cannot change later hits
+            self.cache.put(query_vector, copy.deepcopy(result), tag=tag)
+
+        return result
+
     def _extract_error_summary(self, error_log: str) -> str:
         """
         Extract a summary of the error from the log.
@@ -91,29 +347,21 @@ class ErrorLogAnalyzer:
         Returns:
             Error summary
         """
-        lines = error_log.strip().split('\n')
-
-        # Look for common error patterns
-        error_indicators = ['Error:', 'Exception:', 'Traceback', 'ERROR', 'FATAL']
-
-        summary_lines = []
-        for line in lines:
-            for indicator in error_indicators:
-                if indicator in line:
-                    summary_lines.append(line.strip())
-                    break
+        # One scan of the whole log, stopping at the fifth error line
+        matches = itertools.islice(self._ERROR_LINE.finditer(error_log), 5)
+        summary_lines = [match.group().strip() for match in matches]
 
         if summary_lines:
-            return '\n'.join(summary_lines[:5])  # First 5 error lines
+            return '\n'.join(summary_lines)
 
         # If no specific error found, return first few lines
-        return '\n'.join(lines[:3])
+        return '\n'.join(error_log.strip().split('\n', 3)[:3])
 
     def _generate_llm_advice(
         self,
         error_summary: str,
         relevant_code: List[Dict[str, Any]]
-    ) -> str:
+    ) -> Tuple[str, bool]:
         """
         Generate advice using LLM (Claude).
 
@@ -122,7 +370,7 @@ class ErrorLogAnalyzer:
             relevant_code: List of relevant code chunks
 
         Returns:
-            AI-generated advice string
+            (advice string, False if Claude failed and the advice is rule-based)
         """
         if not relevant_code:
             return (
@@ -131,7 +379,7 @@ class ErrorLogAnalyzer:
                 "1. The codebase has been properly indexed\n"
                 "2. The error is related to the indexed code\n"
                 "3. Try lowering the similarity threshold"
-            )
+            ), True
 
         try:
             # Use LLM to analyze error with context
@@ -139,32 +387,74 @@ class ErrorLogAnalyzer:
             analysis = self.llm_analyzer.analyze_error_with_context(
                 error_summary=error_summary,
                 relevant_code=relevant_code,
-                num_context_chunks=3
+                num_context_chunks=3,
+                raise_errors=True
             )
+            return self._format_llm_advice(analysis, relevant_code), True
 
-            # Add relevant code locations for reference
-            advice_parts = [analysis]
-            advice_parts.append("\n" + "=" * 80)
-            advice_parts.append("RELEVANT CODE LOCATIONS")
-            advice_parts.append("=" * 80)
+        except Exception as e:
+            # Fall back to rule-based advice if LLM fails
+            print(f"LLM analysis failed: {e}")
+            print("Falling back to rule-based advice...")
+            # Note: Using error_summary for consistency, though rule-based doesn't use it much
+            return self._generate_advice(error_summary, relevant_code), False
 
-            for i, result in enumerate(relevant_code[:5], 1):
-                m = result['metadata']
-                advice_parts.append(
-                    f"\n{i}. {m.get('file_path', 'unknown')}:{m.get('start_line', '?')}"
-                )
-                advice_parts.append(f"   Type: {m.get('chunk_type', 'unknown')}")
-                advice_parts.append(f"   Name: {m.get('name', 'unknown')}")
-                advice_parts.append(f"   Similarity: {result['score']:.2%}")
+    async def _agenerate_llm_advice(
+        self,
+        error_summary: str,
+        relevant_code: List[Dict[str, Any]],
+        client=None
+    ) -> Tuple[str, bool]:
+        """Async counterpart of _generate_llm_advice."""
+        if not relevant_code:
+            return self._generate_llm_advice(error_summary, relevant_code)
 
-            return '\n'.join(advice_parts)
+        try:
+            analysis = await self.llm_analyzer.aanalyze_error_with_context(
+                error_summary=error_summary,
+                relevant_code=relevant_code,
+                num_context_chunks=3,
+                client=client,
+                raise_errors=True
+            )
+            return self._format_llm_advice(analysis, relevant_code), True
 
         except Exception as e:
-            # Fall back to rule-based advice if LLM fails
             print(f"LLM analysis failed: {e}")
             print("Falling back to rule-based advice...")
-            # Note: Using error_summary for consistency, though rule-based doesn't use it much
-            return self._generate_advice(error_summary, relevant_code)
+            return self._generate_advice(error_summary, relevant_code), False
+
+    def _format_llm_advice(
+        self,
+        analysis: str,
+        relevant_code: List[Dict[str, Any]]
+    ) -> str:
+        """
+        Append the relevant code locations to Claude's analysis.
+
+        Args:
+            analysis: Analysis text returned by the LLM
+            relevant_code: List of relevant code chunks
+
+        Returns:
+            Advice string
+        """
+        # Add relevant code locations for reference
+        advice_parts = [analysis]
+        advice_parts.append("\n" + "=" * 80)
+        advice_parts.append("RELEVANT CODE LOCATIONS")
+        advice_parts.append("=" * 80)
+
+        for i, result in enumerate(relevant_code[:5], 1):
+            m = result['metadata']
+            advice_parts.append(
+                f"\n{i}. {m.get('file_path', 'unknown')}:{m.get('start_line', '?')}"
+            )
+            advice_parts.append(f"   Type: {m.get('chunk_type', 'unknown')}")
+            advice_parts.append(f"   Name: {m.get('name', 'unknown')}")
+            advice_parts.append(f"   Similarity: {result['score']:.2%}")
+
+        return '\n'.join(advice_parts)
 
     def _generate_advice(
         self,
@@ -193,45 +483,35 @@ class ErrorLogAnalyzer:
         advice_parts = ["Based on the error log and relevant code analysis:\n"]
 
         # Analyze the top results
-        top_result = relevant_code[0]
-        metadata = top_result['metadata']
+        hits = [CodeHit.from_result(result) for result in relevant_code[:4]]
+        top = hits[0]
 
         advice_parts.append(f"\n1. Most relevant code location:")
-        advice_parts.append(f"   File: {metadata.get('file_path', 'unknown')}")
-        advice_parts.append(f"   Type: {metadata.get('chunk_type', 'unknown')}")
-        advice_parts.append(f"   Name: {metadata.get('name', 'unknown')}")
-        advice_parts.append(f"   Lines: {metadata.get('start_line', '?')}-{metadata.get('end_line', '?')}")
-        advice_parts.append(f"   Relevance: {top_result['score']:.2%}")
+        advice_parts.append(f"   File: {top.file_path}")
+        advice_parts.append(f"   Type: {top.chunk_type}")
+        advice_parts.append(f"   Name: {top.name}")
+        advice_parts.append(f"   Lines: {top.start_line}-{top.end_line}")
+        advice_parts.append(f"   Relevance: {top.score:.2%}")
 
         # Provide general recommendations
         advice_parts.append("\n2. Recommended actions:")
 
-        # Analyze error type
-        if 'AttributeError' in error_log:
-            advice_parts.append("   - Check for None values or missing attributes")
-            advice_parts.append("   - Verify object initialization")
-        elif 'KeyError' in error_log:
-            advice_parts.append("   - Validate dictionary keys before access")
-            advice_parts.append("   - Use .get() method with defaults")
-        elif 'TypeError' in error_log:
-            advice_parts.append("   - Check function argument types")
-            advice_parts.append("   - Verify data type conversions")
-        elif 'ImportError' in error_log or 'ModuleNotFoundError' in error_log:
-            advice_parts.append("   - Verify package installation")
-            advice_parts.append("   - Check import paths")
-        else:
-            advice_parts.append("   - Review the relevant code sections")
-            advice_parts.append("   - Check for edge cases and error handling")
+        # Analyze error type: one scan for all known types, then the
+        # first type in _ERROR_ADVICE order that occurs wins
+        found = {match.group() for match in self._ERROR_TYPE.finditer(error_log)}
+        tips = next(
+            (tips for error_type, tips in self._ERROR_ADVICE.items() if error_type in found),
+            self._DEFAULT_ADVICE
+        )
+        advice_parts.extend(f"   - {tip}" for tip in tips)
 
         # List other relevant locations
-        if len(relevant_code) > 1:
+        if len(hits) > 1:
             advice_parts.append("\n3. Other potentially relevant code:")
-            for i, result in enumerate(relevant_code[1:4], 1):
-                m = result['metadata']
-                advice_parts.append(
-                    f"   {i}. {m.get('file_path', 'unknown')}:"
-                    f"{m.get('start_line', '?')} ({result['score']:.2%} match)"
-                )
+            advice_parts.extend(
+                f"   {i}. {hit.file_path}:{hit.start_line} ({hit.score:.2%} match)"
+                for i, hit in enumerate(hits[1:], 1)
+            )
 
         return '\n'.join(advice_parts)
 
@@ -251,8 +531,9 @@ class ErrorLogAnalyzer:
         # Use the top result's score as primary indicator
         top_score = relevant_code[0]['score']
 
-        # Boost confidence if we have multiple relevant results
-        num_results = len([r for r in relevant_code if r['score'] > 0.5])
+        # Boost confidence if we have multiple relevant results (counted
+        # without building a filtered list)
+        num_results = sum(r['score'] > 0.5 for r in relevant_code)
         result_boost = min(num_results * 0.1, 0.3)
 
         confidence = min(top_score + result_boost, 1.0)
@@ -261,22 +542,67 @@ class ErrorLogAnalyzer:
     def analyze_multiple_errors(
         self,
         error_logs: List[str],
-        num_results: int = 3
+        num_results: int = 3,
+        max_concurrency: int = 8
     ) -> List[AnalysisResult]:
         """
-        Analyze multiple error logs.
+        Analyze multiple error logs concurrently.
 
         Args:
             error_logs: List of error log texts
             num_results: Number of results per error
+            max_concurrency: Maximum number of logs analyzed at once
 
         Returns:
-            List of analysis results
+            List of analysis results (in input order)
         """
-        results = []
-        for error_log in error_logs:
-            result = self.analyze_error(error_log, num_results=num_results)
-            results.append(result)
+        return asyncio.run(
+            self.aanalyze_multiple_errors(error_logs, num_results, max_concurrency)
+        )
+
+    async def aanalyze_multiple_errors(
+        self,
+        error_logs: List[str],
+        num_results: int = 3,
+        max_concurrency: int = 8
+    ) -> List[AnalysisResult]:
+        """
+        Analyze multiple error logs concurrently from within an event loop.
+
+        The logs are embedded together in one batch. Each log's search and
+        Claude request then run as soon as a slot is free,
+        so searches for later logs overlap with Claude requests for earlier
+        ones. A semaphore keeps at most max_concurrency analyses in flight.
+
+        Args:
+            error_logs: List of error log texts
+            num_results: Number of results per error
+            max_concurrency: Maximum number of logs analyzed at once
+
+        Returns:
+            List of analysis results (in input order)
+        """
+        # One embedding pass for all logs instead of a forward per log
+        query_vectors = await asyncio.to_thread(self.indexer.embed_queries, error_logs)
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+        results: List[Optional[AnalysisResult]] = [None] * len(error_logs)
+
+        async def analyze(i: int, error_log: str, client):
+            async with semaphore:
+                results[i] = await self.aanalyze_error(
+                    error_log, num_results=num_results, client=client,
+                    query_vector=query_vectors[i]
+                )
+
+        async with contextlib.AsyncExitStack() as stack:
+            client = None
+            if self.use_llm and self.llm_analyzer:
+                # One connection pool for all requests
+                client = await stack.enter_async_context(self.llm_analyzer.async_client())
+            await asyncio.gather(*[
+                analyze(i, error_log, client) for i, error_log in enumerate(error_logs)
+            ])
 
         return results
 
@@ -311,14 +637,20 @@ class ErrorLogAnalyzer:
         if result.relevant_code:
             output.append("\n\nRELEVANT CODE DETAILS:")
             output.append("-" * 80)
-            for i, code_info in enumerate(result.relevant_code[:3], 1):
-                metadata = code_info['metadata']
-                output.append(f"\n[{i}] {metadata.get('name', 'unknown')}")
-                output.append(f"    File: {metadata.get('file_path', 'unknown')}")
-                output.append(f"    Type: {metadata.get('chunk_type', 'unknown')}")
-                output.append(f"    Lines: {metadata.get('start_line', '?')}-{metadata.get('end_line', '?')}")
-                output.append(f"    Match: {code_info['score']:.2%}")
+            output.extend(
+                f"\n[{i}] {hit.name}\n"
+                f"    File: {hit.file_path}\n"
+                f"    Type: {hit.chunk_type}\n"
+                f"    Lines: {hit.start_line}-{hit.end_line}\n"
+                f"    Match: {hit.score:.2%}"
+                for i, hit in enumerate(map(CodeHit.from_result, result.relevant_code[:3]), 1)
+            )
 
         output.append("\n" + "=" * 80)
 
         return '\n'.join(output)
+
+
+def _result_ids(relevant_code: List[Dict[str, Any]]) -> List[Any]:
+    """IDs of search results, in rank order."""
+    return [code.get('id') for code in relevant_code]
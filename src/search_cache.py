@@ -0,0 +1,145 @@
+"""
+Short-lived cache of vector search results, in process or shared through Redis.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+from collections import OrderedDict
+import copy
+import hashlib
+import json
+import threading
+import time
+import numpy as np
+
+
+def search_key(
+    query_vector,
+    limit: int,
+    score_threshold: Optional[float],
+    filter_conditions: Optional[Dict[str, Any]]
+) -> str:
+    """
+    Build the cache key of a search.
+
+    Args:
+        query_vector: Query embedding vector
+        limit: Maximum number of results
+        score_threshold: Minimum similarity score
+        filter_conditions: Payload filters
+
+    Returns:
+        Hex digest of the query vector and search parameters
+    """
+    digest = hashlib.blake2b(np.asarray(query_vector, dtype=np.float32).tobytes(), digest_size=16)
+    params = json.dumps([limit, score_threshold, filter_conditions], sort_keys=True, default=str)
+    digest.update(params.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class SearchCache:
+    """
+    In-process TTL cache of search results, evicting least recently used entries.
+
+    Results are deep-copied in and out, so callers may modify the result
+    dicts (and their metadata) they are given.
+    """
+
+    def __init__(self, ttl: float = 300.0, capacity: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            ttl: Seconds a cached result stays valid
+            capacity: Maximum number of entries
+        """
+        self.ttl = ttl
+        self.capacity = capacity
+        self._lock = threading.Lock()
+        # key -> (expiry time, results), least recently used first
+        self._entries: "OrderedDict[str, Tuple[float, List[Dict[str, Any]]]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached results for a key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, results = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+        return copy.deepcopy(results)
+
+    def put(self, key: str, results: List[Dict[str, Any]]):
+        """Cache the results of a search."""
+        results = copy.deepcopy(results)
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, results)
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop all entries after the collection changed."""
+        with self._lock:
+            self._entries.clear()
+
+
+class RedisSearchCache:
+    """
+    Search results cache in Redis, shared by every process using the collection.
+
+    Keys are prefixed with a per-collection version number that writers
+    increment, so invalidation is a single INCR and stale entries simply
+    expire. The cache is best effort: while Redis is unreachable, searches
+    go to Qdrant. Requires the `redis` package.
+    """
+
+    def __init__(self, url: str, collection_name: str, ttl: float = 300.0):
+        """
+        Connect to Redis.
+
+        Args:
+            url: Redis URL, e.g. redis://localhost:6379/0
+            collection_name: Collection whose results are cached
+            ttl: Seconds a cached result stays valid
+        """
+        try:
+            import redis
+        except ImportError:
+            raise ImportError(
+                "A Redis search cache requires the redis package: pip install redis"
+            )
+
+        self.client = redis.Redis.from_url(url)
+        self._errors = redis.RedisError
+        self.ttl = ttl
+        self._version_key = f"qsrch:{collection_name}:version"
+        self._prefix = f"qsrch:{collection_name}"
+
+    def _key(self, key: str) -> str:
+        version = int(self.client.get(self._version_key) or 0)
+        return f"{self._prefix}:{version}:{key}"
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached results for a key, or None if missing, expired or unreachable."""
+        try:
+            data = self.client.get(self._key(key))
+        except self._errors:
+            return None
+        return json.loads(data) if data is not None else None
+
+    def put(self, key: str, results: List[Dict[str, Any]]):
+        """Cache the results of a search."""
+        try:
+            self.client.setex(self._key(key), max(1, int(self.ttl)), json.dumps(results, default=str))
+        except self._errors:
+            pass
+
+    def invalidate(self):
+        """Make all entries unreachable after the collection changed."""
+        try:
+            self.client.incr(self._version_key)
+        except self._errors:
+            pass
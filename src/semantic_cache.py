@@ -0,0 +1,275 @@
+"""
+In-memory semantic cache: looks up values by the cosine similarity of their key vectors.
+"""
+
+from typing import Any, Callable, Dict, Hashable, List, Optional
+from collections import OrderedDict
+from pathlib import Path
+import os
+import pickle
+import threading
+import numpy as np
+
+
+class SemanticCache:
+    """
+    Maps normalized vectors to values and returns the value of the most
+    similar cached vector when it is close enough.
+
+    Vectors live in one preallocated matrix, so a lookup is a single
+    matrix-vector product (an exact flat inner-product search). Entries are
+    evicted least-recently-used once the cache is full. All methods are
+    safe to call from several threads.
+    """
+
+    def __init__(self, dim: int, capacity: int = 1024, threshold: float = 0.95):
+        """
+        Initialize the cache.
+
+        Args:
+            dim: Dimension of the key vectors
+            capacity: Maximum number of entries
+            threshold: Minimum cosine similarity for a hit
+        """
+        self.dim = dim
+        self.capacity = capacity
+        self.threshold = threshold
+
+        self._vectors = np.zeros((capacity, dim), dtype=np.float32)
+        self._values: List[Any] = [None] * capacity
+        self._tags: List[Optional[Hashable]] = [None] * capacity
+        # Occupied slots, least recently used first
+        self._lru: "OrderedDict[int, None]" = OrderedDict()
+        self._free = list(range(capacity - 1, -1, -1))
+
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, vector, tag: Optional[Hashable] = None) -> Optional[Any]:
+        """
+        Find the value stored under the most similar vector.
+
+        Args:
+            vector: Normalized query vector
+            tag: Only entries stored with an equal tag can match (e.g. the
+                search parameters the value was computed with)
+
+        Returns:
+            The cached value, or None if no entry is similar enough
+        """
+        query = np.asarray(vector, dtype=np.float32)
+        with self._lock:
+            if self._lru:
+                slots = np.fromiter(
+                    (slot for slot in self._lru if self._tags[slot] == tag),
+                    dtype=np.intp
+                )
+                if len(slots):
+                    scores = self._vectors[slots] @ query
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.threshold:
+                        slot = int(slots[best])
+                        self._lru.move_to_end(slot)
+                        self.hits += 1
+                        return self._values[slot]
+
+            self.misses += 1
+            return None
+
+    def put(self, vector, value: Any, tag: Optional[Hashable] = None):
+        """
+        Store a value under a vector, evicting the least recently used entry if full.
+
+        Args:
+            vector: Normalized key vector
+            value: Value to cache
+            tag: Tag that lookups must match
+        """
+        with self._lock:
+            if self._free:
+                slot = self._free.pop()
+            else:
+                slot, _ = self._lru.popitem(last=False)
+
+            self._vectors[slot] = np.asarray(vector, dtype=np.float32)
+            self._values[slot] = value
+            self._tags[slot] = tag
+            self._lru[slot] = None
+
+    def clear(self):
+        """Drop all entries (e.g. after the data the values came from changed)."""
+        with self._lock:
+            self._values = [None] * self.capacity
+            self._tags = [None] * self.capacity
+            self._lru.clear()
+            self._free = list(range(self.capacity - 1, -1, -1))
+
+    def save(
+        self,
+        path: str,
+        retag: Optional[Callable[[Hashable], Optional[Hashable]]] = None,
+        keep: Optional[Callable[[Any], bool]] = None
+    ) -> int:
+        """
+        Write the entries to a snapshot file, to warm up a cache in a later process.
+
+        Vectors are stored as float16, values and tags are pickled.
+
+        Args:
+            path: Snapshot file to (over)write
+            retag: Maps each tag to the tag to save; entries it maps to None are left out
+            keep: Only entries whose value it returns True for are saved
+
+        Returns:
+            Number of entries saved
+        """
+        with self._lock:
+            slots = list(self._lru)
+            tags = [self._tags[slot] for slot in slots]
+            values = [self._values[slot] for slot in slots]
+            vectors = self._vectors[slots].astype(np.float16)
+
+        if retag is not None:
+            tags = [retag(tag) for tag in tags]
+        if retag is not None or keep is not None:
+            kept = [
+                i for i, (tag, value) in enumerate(zip(tags, values))
+                if tag is not None and (keep is None or keep(value))
+            ]
+            tags = [tags[i] for i in kept]
+            values = [values[i] for i in kept]
+            vectors = vectors[kept]
+
+        snapshot_path = Path(path).expanduser()
+        snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        # Write next to the target and rename, so readers never see a partial file
+        tmp_path = snapshot_path.with_name(snapshot_path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump({"vectors": vectors, "values": values, "tags": tags}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, snapshot_path)
+        return len(values)
+
+    def load(
+        self,
+        path: str,
+        retag: Optional[Callable[[Hashable], Optional[Hashable]]] = None,
+        keep: Optional[Callable[[Any], bool]] = None
+    ) -> int:
+        """
+        Add the entries of a snapshot written by save().
+
+        Args:
+            path: Snapshot file to read (a missing file loads nothing)
+            retag: Maps each saved tag to the tag to store the entry under;
+                entries it maps to None are skipped
+            keep: Only entries whose value it returns True for are loaded
+
+        Returns:
+            Number of entries loaded
+        """
+        snapshot_path = Path(path).expanduser()
+        if not snapshot_path.exists():
+            return 0
+        with open(snapshot_path, "rb") as f:
+            snapshot = pickle.load(f)
+
+        vectors = snapshot["vectors"]
+        if vectors.ndim != 2 or vectors.shape[1] != self.dim:
+            return 0
+
+        entries = zip(vectors, snapshot["values"], snapshot["tags"])
+        if retag is not None:
+            entries = ((vector, value, retag(tag)) for vector, value, tag in entries)
+            entries = [entry for entry in entries if entry[2] is not None]
+        if keep is not None:
+            entries = [entry for entry in entries if keep(entry[1])]
+
+        # Oldest first, so the most recently used entries survive a smaller capacity
+        entries = list(entries)[-self.capacity:]
+        for vector, value, tag in entries:
+            self.put(vector, value, tag=tag)
+        return len(entries)
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and the current size."""
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size": len(self),
+        }
+
+
+class QueryCache(SemanticCache):
+    """
+    SemanticCache whose similarity threshold adapts to how reliable its hits are.
+
+    Every verify_every-th hit is checked against a fresh lookup by the
+    caller. When the cached and fresh results agree the threshold is
+    relaxed by one step, letting more near-duplicate queries hit; when
+    they disagree it is tightened.
+    """
+
+    def __init__(
+        self,
+        dim: int,
+        capacity: int = 256,
+        threshold: float = 0.95,
+        min_threshold: float = 0.93,
+        max_threshold: float = 0.99,
+        step: float = 0.01,
+        verify_every: int = 10
+    ):
+        """
+        Initialize the cache.
+
+        Args:
+            dim: Dimension of the key vectors
+            capacity: Maximum number of entries
+            threshold: Initial minimum cosine similarity for a hit
+            min_threshold: Lowest the threshold may adapt to; below about
+                0.93 distinct errors in the same module start to collide
+            max_threshold: Highest the threshold may adapt to
+            step: Threshold change per verified hit
+            verify_every: Verify one in this many hits (0 never verifies)
+        """
+        super().__init__(dim, capacity=capacity, threshold=threshold)
+        self.min_threshold = min_threshold
+        self.max_threshold = max_threshold
+        self.step = step
+        self.verify_every = verify_every
+        self.verified = 0
+        self.disagreements = 0
+
+    def should_verify(self) -> bool:
+        """Whether the hit just returned by get() should be checked against a fresh lookup."""
+        return bool(self.verify_every) and self.hits % self.verify_every == 0
+
+    def record_verification(self, agreed: bool):
+        """
+        Adapt the threshold to the outcome of a verified hit.
+
+        Args:
+            agreed: Whether the cached result matched the fresh one
+        """
+        with self._lock:
+            self.verified += 1
+            if agreed:
+                self.threshold = max(self.min_threshold, round(self.threshold - self.step, 6))
+            else:
+                self.disagreements += 1
+                self.threshold = min(self.max_threshold, round(self.threshold + self.step, 6))
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, the current size and the adapted threshold."""
+        return {
+            **super().stats(),
+            "threshold": self.threshold,
+            "verified": self.verified,
+            "disagreements": self.disagreements,
+        }
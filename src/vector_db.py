@@ -2,8 +2,8 @@
 Qdrant vector database handler for fast similarity search.
 """
 
-from typing import List, Dict, Any, Optional
-from qdrant_client import QdrantClient
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+from qdrant_client import AsyncQdrantClient, QdrantClient
 from qdrant_client.models import (
     Distance,
     VectorParams,
@@ -13,84 +13,392 @@ from qdrant_client.models import (
     MatchValue
 )
 from qdrant_client.http import models
+import asyncio
+import atexit
+import concurrent.futures
+import contextlib
+import functools
+import itertools
+import json
+import logging
+import os
+import threading
+import time
 import uuid
+import numpy as np
+from .hashing import content_digest
+from .search_cache import SearchCache, RedisSearchCache, search_key
+
+
+logger = logging.getLogger(__name__)
+
+# Search presets trading recall for speed: HNSW beam width, and how many extra quantized candidates to rescore
+# with the full vectors
+SEARCH_PROFILES = {
+    "fast": {"hnsw_ef": 32, "oversampling": 1.0, "rescore": False},
+    "balanced": {"hnsw_ef": 64, "oversampling": 2.0, "rescore": True},
+    "recall-max": {"hnsw_ef": 256, "oversampling": 4.0, "rescore": True},
+}
+
+
+# Clients shared by every QdrantVectorDB talking to the same server or local
+# directory, so they reuse one connection pool (and local storage, which only
+# one client may open at a time)
+_CLIENT_CACHE: Dict[Tuple, QdrantClient] = {}
+_CLIENT_CACHE_LOCK = threading.Lock()
+
+
+def _shared_client(key: Tuple, **kwargs) -> QdrantClient:
+    """Return the cached client for key, creating it with kwargs on first use."""
+    with _CLIENT_CACHE_LOCK:
+        client = _CLIENT_CACHE.get(key)
+        if client is None:
+            client = _CLIENT_CACHE[key] = QdrantClient(**kwargs)
+        return client
+
+
+def close_clients():
+    """Close and forget all shared clients (e.g. between tests)."""
+    with _CLIENT_CACHE_LOCK:
+        clients = list(_CLIENT_CACHE.values())
+        _CLIENT_CACHE.clear()
+    for client in clients:
+        client.close()
+
+
+# Close local storage before interpreter teardown makes it fail
+atexit.register(close_clients)
+
+
+def _random_ids(n: int) -> List[str]:
+    """
+    Generate n random (version 4) UUID strings.
+
+    One os.urandom call and one hex conversion for the whole batch instead
+    of a uuid4() object per point.
+
+    Args:
+        n: Number of IDs
+
+    Returns:
+        UUID strings in canonical 8-4-4-4-12 form
+    """
+    raw = np.frombuffer(os.urandom(16 * n), dtype=np.uint8).reshape(n, 16).copy()
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40  # version 4
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80  # RFC 4122 variant
+    h = raw.tobytes().hex()
+    return [
+        f"{h[i:i + 8]}-{h[i + 8:i + 12]}-{h[i + 12:i + 16]}-{h[i + 16:i + 20]}-{h[i + 20:i + 32]}"
+        for i in range(0, 32 * n, 32)
+    ]
+
+
+def _content_ids(payloads: List[Dict[str, Any]]) -> List[str]:
+    """
+    Derive a stable UUID string from each payload's content.
+
+    Re-inserting an identical point then overwrites it instead of adding a
+    duplicate, which makes retried or repeated uploads idempotent.
+
+    Args:
+        payloads: Point payloads (must be JSON-serializable, or str()-able)
+
+    Returns:
+        One UUID string per payload
+    """
+    return [
+        str(uuid.UUID(bytes=content_digest(json.dumps(payload, sort_keys=True, default=str))))
+        for payload in payloads
+    ]
+
+
+@functools.lru_cache(maxsize=256)
+def _compile_filter(items: Tuple[Tuple[str, Any], ...]) -> Filter:
+    """Build the filter for (key, value) pairs; memoized, so callers must not modify it."""
+    return Filter(must=[
+        FieldCondition(key=key, match=MatchValue(value=value))
+        for key, value in items
+    ])
 
 
 class QdrantVectorDB:
     """Handles interactions with Qdrant vector database."""
 
+    # HNSW graph of new collections: denser than the default (m=16,
+    # ef_construct=100) for better recall at a low search beam width
+    HNSW_M = 32
+    HNSW_EF_CONSTRUCT = 256
+    # Qdrant's default indexing threshold (KB), restored after bulk loads
+    # when the collection does not report its own
+    INDEXING_THRESHOLD = 20000
+    # Seconds get_collection_info reuses its last answer while nothing is written
+    INFO_CACHE_TTL = 1.0
+
     def __init__(
         self,
         host: str = "localhost",
         port: int = 6333,
+        grpc_port: int = 6334,
+        prefer_grpc: bool = True,
+        pool_size: int = 100,
+        timeout: int = 60,
         collection_name: str = "code_chunks",
-        use_memory: bool = False
+        use_memory: bool = False,
+        quantization: Optional[str] = "scalar",
+        path: Optional[str] = None,
+        vector_datatype: Optional[str] = None,
+        search_profile: str = "balanced",
+        search_cache_ttl: Optional[float] = 300.0,
+        redis_url: Optional[str] = None,
+        rerank_oversampling: Optional[int] = None
     ):
         """
         Initialize Qdrant client.
 
         Args:
             host: Qdrant server host
-            port: Qdrant server port
+            port: Qdrant server HTTP port
+            grpc_port: Qdrant server gRPC port
+            prefer_grpc: Talk to the server over gRPC, which has much lower
+                per-request overhead than HTTP+JSON
+            pool_size: Number of pooled server connections, so concurrent
+                upserts and searches do not queue for a connection
+            timeout: Server request timeout in seconds
             collection_name: Name of the collection to use
             use_memory: If True, use in-memory storage (for testing)
+            quantization: Vector quantization for new collections ('scalar'
+                for int8, which costs well under 1% recall with rescoring,
+                'binary', or None for full vectors only)
+            path: If set, use local storage persisted in this directory
+            vector_datatype: Storage type of vectors in new collections
+                ('float16' or None for float32)
+            search_profile: Speed/recall preset from SEARCH_PROFILES
+            search_cache_ttl: Seconds identical searches are answered from a
+                cache instead of Qdrant (None disables the cache)
+            redis_url: Share the search cache between processes through this
+                Redis server (requires `redis`; falls back to an in-process cache)
+            rerank_oversampling: Fetch this many times more candidates than
+                requested, with their vectors, and rank them by exact cosine
+                similarity here (useful with 'binary' quantization and the
+                'fast' profile, which skips server-side rescoring)
         """
+        if quantization not in (None, "binary", "scalar"):
+            raise ValueError(f"Unsupported quantization: {quantization}")
+        if vector_datatype not in (None, "float16"):
+            raise ValueError(f"Unsupported vector datatype: {vector_datatype}")
+        if search_profile not in SEARCH_PROFILES:
+            raise ValueError(f"Unknown search profile: {search_profile}")
+        if rerank_oversampling is not None and rerank_oversampling < 1:
+            raise ValueError("rerank_oversampling must be at least 1")
+
+        # Settings for async_client(); local storage has a single sync client
+        self._server_settings = None
+
+        # In-memory databases are private to each instance
         if use_memory:
             self.client = QdrantClient(":memory:")
+        elif path:
+            path = os.path.realpath(os.path.expanduser(path))
+            self.client = _shared_client(("path", path), path=path)
         else:
-            self.client = QdrantClient(host=host, port=port)
+            self._server_settings = {
+                "host": host,
+                "port": port,
+                "grpc_port": grpc_port,
+                "prefer_grpc": prefer_grpc,
+                "pool_size": pool_size,
+                "timeout": timeout,
+            }
+            self.client = _shared_client(
+                ("server", *self._server_settings.values()),
+                **self._server_settings
+            )
 
         self.collection_name = collection_name
+        self.quantization = quantization
+        self.vector_datatype = vector_datatype
+        self.search_profile = search_profile
+        self.rerank_oversampling = rerank_oversampling
+        # (time fetched, collection info) of the last get_collection_info call
+        self._info_cache: Tuple[float, Optional[Dict[str, Any]]] = (0.0, None)
+        # Local mode always searches exactly and ignores search params
+        self.is_local = use_memory or bool(path)
+
+        self.search_cache = None
+        if search_cache_ttl:
+            if redis_url:
+                try:
+                    self.search_cache = RedisSearchCache(redis_url, collection_name, ttl=search_cache_ttl)
+                except ImportError as e:
+                    logger.warning("%s; using an in-process search cache", e)
+            if self.search_cache is None:
+                self.search_cache = SearchCache(ttl=search_cache_ttl)
 
-    def create_collection(self, vector_size: int, distance: Distance = Distance.COSINE):
+    def create_collection(self, vector_size: int, distance: Distance = Distance.COSINE) -> bool:
         """
         Create a new collection.
 
         Args:
             vector_size: Dimension of the embedding vectors
             distance: Distance metric to use (COSINE, EUCLID, DOT)
+
+        Returns:
+            True if the collection was created, False if it already existed
         """
         try:
-            # Check if collection exists
-            collections = self.client.get_collections().collections
-            collection_names = [c.name for c in collections]
+            quantization_config = self._quantization_config()
+
+            if self.client.collection_exists(self.collection_name):
+                logger.info("Collection '%s' already exists", self.collection_name)
+                self._enable_quantization(quantization_config)
+                return False
 
-            if self.collection_name in collection_names:
-                print(f"Collection '{self.collection_name}' already exists")
-                return
+            # With quantization, the full vectors are only read for rescoring,
+            # so they can live on disk while the quantized copies stay in RAM
 
             # Create collection
             self.client.create_collection(
                 collection_name=self.collection_name,
-                vectors_config=VectorParams(size=vector_size, distance=distance)
+                vectors_config=VectorParams(
+                    size=vector_size,
+                    distance=distance,
+                    on_disk=quantization_config is not None,
+                    datatype=models.Datatype.FLOAT16 if self.vector_datatype == "float16" else None
+                ),
+                hnsw_config=models.HnswConfigDiff(m=self.HNSW_M, ef_construct=self.HNSW_EF_CONSTRUCT),
+                quantization_config=quantization_config
             )
-            print(f"Created collection '{self.collection_name}' with vector size {vector_size}")
+            logger.info("Created collection '%s' with vector size %d", self.collection_name, vector_size)
+            self._invalidate_caches()
+            return True
 
         except Exception as e:
-            print(f"Error creating collection: {e}")
+            logger.error("Error creating collection: %s", e)
             raise
 
+    def _quantization_config(self):
+        """Build the quantization config for self.quantization (None if disabled)."""
+        if self.quantization == "binary":
+            return models.BinaryQuantization(
+                binary=models.BinaryQuantizationConfig(always_ram=True)
+            )
+        if self.quantization == "scalar":
+            return models.ScalarQuantization(
+                scalar=models.ScalarQuantizationConfig(
+                    type=models.ScalarType.INT8,
+                    quantile=0.99,
+                    always_ram=True
+                )
+            )
+        return None
+
+    def _enable_quantization(self, quantization_config):
+        """
+        Quantize an existing collection that was created without quantization.
+
+        The server builds the quantized vectors in the background; searches
+        keep working on the full vectors until it is done. Local mode does
+        not quantize, so this is a no-op there.
+
+        Args:
+            quantization_config: Config from _quantization_config()
+        """
+        if quantization_config is None or self.is_local:
+            return
+
+        info = self.client.get_collection(collection_name=self.collection_name)
+        if info.config.quantization_config is not None:
+            return
+
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            quantization_config=quantization_config
+        )
+        logger.info("Enabled %s quantization on '%s'", self.quantization, self.collection_name)
+
+    def set_indexing_threshold(self, threshold: int):
+        """
+        Change the size (in KB) above which segments get an HNSW index.
+
+        A threshold of 0 disables indexing, which makes bulk uploads much
+        cheaper; restoring it builds the graph once in the background.
+        Local mode has no indexing optimizer, so this is a no-op there.
+
+        Args:
+            threshold: Indexing threshold in kilobytes (0 disables indexing)
+        """
+        if self.is_local:
+            return
+
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            optimizer_config=models.OptimizersConfigDiff(indexing_threshold=threshold)
+        )
+
+    @contextlib.contextmanager
+    def bulk_mode(self):
+        """
+        Defer HNSW graph construction while loading many points.
+
+        Inside the block the graph is disabled (m=0) and segments are not
+        indexed, so upserts only store points; on exit the collection's
+        previous graph settings are restored and the server builds the
+        index in one background pass. Local mode has no HNSW index, so this
+        is a no-op there.
+        """
+        if self.is_local:
+            yield
+            return
+
+        config = self.client.get_collection(collection_name=self.collection_name).config
+        m = config.hnsw_config.m if config.hnsw_config.m is not None else self.HNSW_M
+        indexing_threshold = config.optimizer_config.indexing_threshold
+        if indexing_threshold is None:
+            indexing_threshold = self.INDEXING_THRESHOLD
+
+        self.client.update_collection(
+            collection_name=self.collection_name,
+            hnsw_config=models.HnswConfigDiff(m=0),
+            optimizer_config=models.OptimizersConfigDiff(indexing_threshold=0)
+        )
+        try:
+            yield
+        finally:
+            self.client.update_collection(
+                collection_name=self.collection_name,
+                hnsw_config=models.HnswConfigDiff(m=m),
+                optimizer_config=models.OptimizersConfigDiff(indexing_threshold=indexing_threshold)
+            )
+
     def delete_collection(self):
         """Delete the collection."""
         try:
             self.client.delete_collection(collection_name=self.collection_name)
-            print(f"Deleted collection '{self.collection_name}'")
+            self._invalidate_caches()
+            logger.info("Deleted collection '%s'", self.collection_name)
         except Exception as e:
-            print(f"Error deleting collection: {e}")
+            logger.error("Error deleting collection: %s", e)
 
     def insert_chunk(
         self,
-        vector: List[float],
+        vector: Union[List[float], np.ndarray],
         metadata: Dict[str, Any],
-        chunk_id: Optional[str] = None
+        chunk_id: Optional[str] = None,
+        wait: bool = True
     ) -> str:
         """
         Insert a single code chunk into the database.
 
+        When streaming chunks in one at a time, pass wait=False so each call
+        returns as soon as the server has accepted the point, and call
+        flush() at the end of the stream (or of each window) before relying
+        on the points being searchable.
+
         Args:
-            vector: Embedding vector
+            vector: Embedding vector (list or 1-D array)
             metadata: Metadata about the code chunk
             chunk_id: Optional ID for the chunk (auto-generated if not provided)
+            wait: Wait until the point has been applied to the collection
 
         Returns:
             ID of the inserted chunk
@@ -108,66 +416,456 @@ class QdrantVectorDB:
             self.client.upsert(
                 collection_name=self.collection_name,
                 points=[point],
-                wait=True  # Wait for operation to complete
+                wait=wait
             )
         except Exception as e:
-            print(f"Error inserting chunk: {e}")
+            logger.error("Error inserting chunk: %s", e)
             raise
+        finally:
+            # After the write, so a search racing with it cannot cache the
+            # collection as it was before
+            self._invalidate_caches()
 
         return chunk_id
 
+    def flush(self):
+        """
+        Wait until all earlier writes to the collection have been applied.
+
+        A collection applies updates in order, so a waiting no-op update
+        (deleting no points) returns only once everything sent before it,
+        e.g. by insert_chunk(wait=False), is searchable. Cached searches
+        and collection info from before the barrier are dropped.
+        """
+        self.client.delete(
+            collection_name=self.collection_name,
+            points_selector=models.PointIdsList(points=[]),
+            wait=True
+        )
+        self._invalidate_caches()
+
     def insert_batch(
         self,
-        vectors: List[List[float]],
-        metadatas: List[Dict[str, Any]]
+        vectors: Union[np.ndarray, Iterable[List[float]]],
+        metadatas: Iterable[Dict[str, Any]],
+        batch_size: int = 128,
+        bulk_mode: bool = False,
+        ids: Optional[Iterable[str]] = None,
+        use_content_hash: bool = False
     ) -> List[str]:
         """
         Insert multiple code chunks into the database.
 
+        Points are sent as column-oriented batches (one list each of IDs,
+        vectors and payloads) rather than a PointStruct per chunk. The
+        inputs are consumed batch_size points at a time, so generators and
+        np.memmap arrays larger than memory can be inserted. Uploads run in
+        this process; use upload_collection to spread a large load over
+        several processes.
+
+        Args:
+            vectors: 2-D float32 array (memory-mapped or not), or any
+                iterable of embedding vectors
+            metadatas: Metadata dictionaries, in the same order
+            batch_size: Number of points sent per upload request
+            bulk_mode: Defer HNSW indexing until the insert is done (see
+                bulk_mode()); worth it for thousands of points
+            ids: Point IDs (UUID strings), in the same order; points with
+                an existing ID are overwritten
+            use_content_hash: Without ids, derive each ID from a hash of
+                the payload instead of generating a random one, so
+                inserting the same chunk again does not duplicate it
+
+        Returns:
+            List of IDs for the inserted chunks
+        """
+        with self.bulk_mode() if bulk_mode else contextlib.nullcontext():
+            ids = self._upload(
+                vectors, metadatas, batch_size=batch_size, parallel=1,
+                ids=ids, use_content_hash=use_content_hash
+            )
+        logger.info("Inserted %d chunks into the database", len(ids))
+        return ids
+
+    def insert_from_texts(
+        self,
+        texts: List[str],
+        metadatas: List[Dict[str, Any]],
+        embedder: Any,
+        batch_size: int = 128,
+        use_content_hash: bool = False
+    ) -> List[str]:
+        """
+        Embed and insert texts batch by batch, embedding the next batch while one uploads.
+
+        Unlike embedding everything first and calling insert_batch, only
+        about two batches of embeddings exist at a time, and model time
+        overlaps with network time (the model releases the GIL while it
+        runs).
+
+        Args:
+            texts: Texts to embed (e.g. chunk contents)
+            metadatas: Metadata dictionaries, in the same order
+            embedder: Object whose embed_batch(texts) returns a 2-D float32
+                array, such as E5Embedder
+            batch_size: Number of texts per embedding batch and upsert
+            use_content_hash: Derive IDs from the payloads (see insert_batch)
+
+        Returns:
+            List of IDs for the inserted chunks
+        """
+        if len(texts) != len(metadatas):
+            raise ValueError("Number of texts and metadatas must match")
+
+        def embedded_batches(pool):
+            pending = pool.submit(embedder.embed_batch, texts[:batch_size])
+            for start in range(0, len(texts), batch_size):
+                vectors = pending.result()
+                if start + batch_size < len(texts):
+                    pending = pool.submit(embedder.embed_batch, texts[start + batch_size:start + 2 * batch_size])
+                yield from self._iter_batches(
+                    vectors, metadatas[start:start + batch_size], batch_size,
+                    use_content_hash=use_content_hash
+                )
+
+        try:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=1) as pool:
+                ids = self._upsert_stream(embedded_batches(pool)) if texts else []
+        except Exception as e:
+            logger.error("Error inserting chunks: %s", e)
+            raise
+        finally:
+            # After the write, so a search racing with it cannot cache the
+            # collection as it was before
+            self._invalidate_caches()
+        logger.info("Inserted %d chunks into the database", len(ids))
+        return ids
+
+    def upload_collection(
+        self,
+        vectors: Union[np.ndarray, List[List[float]]],
+        metadatas: List[Dict[str, Any]],
+        batch_size: int = 256,
+        parallel: Optional[int] = None,
+        ids: Optional[Iterable[str]] = None,
+        use_content_hash: bool = False
+    ) -> List[str]:
+        """
+        Bulk-load code chunks with the client's parallel uploader.
+
+        The client splits the points into batches and sends them from
+        several worker processes at once, which is much faster than
+        sequential upserts for large loads. Local mode has no server to
+        parallelize against and uploads from this process.
+
+        Args:
+            vectors: 2-D float32 array (passed through without conversion) or list
+                of embedding vectors
+            metadatas: List of metadata dictionaries
+            batch_size: Number of points per upload request
+            parallel: Number of upload processes (defaults to min(8, CPU count))
+            ids: Point IDs, in the same order (see insert_batch)
+            use_content_hash: Without ids, derive IDs from the payloads (see insert_batch)
+
+        Returns:
+            List of IDs for the inserted chunks
+        """
+        if self.is_local:
+            parallel = 1
+        elif parallel is None:
+            parallel = min(8, os.cpu_count() or 1)
+
+        ids = self._upload(
+            vectors, metadatas, batch_size=batch_size, parallel=parallel,
+            ids=ids, use_content_hash=use_content_hash
+        )
+        logger.info("Uploaded %d chunks into the database", len(ids))
+        return ids
+
+    def _upload(
+        self,
+        vectors: Union[np.ndarray, Iterable[List[float]]],
+        metadatas: Iterable[Dict[str, Any]],
+        batch_size: int,
+        parallel: int,
+        ids: Optional[Iterable[str]] = None,
+        use_content_hash: bool = False
+    ) -> List[str]:
+        """
+        Upload vectors under the given, content-derived or fresh IDs.
+
+        In-process uploads stream column-oriented upserts (see
+        _iter_batches); parallel ones go through the client's multi-process
+        uploader.
+        """
+        try:
+            if parallel == 1:
+                return self._upsert_stream(self._iter_batches(
+                    vectors, metadatas, batch_size, ids=ids, use_content_hash=use_content_hash
+                ))
+
+            if len(vectors) != len(metadatas):
+                raise ValueError("Number of vectors and metadatas must match")
+            if ids is not None:
+                ids = list(ids)
+                if len(ids) != len(metadatas):
+                    raise ValueError("Number of ids and metadatas must match")
+            elif use_content_hash:
+                ids = _content_ids(metadatas)
+            else:
+                ids = _random_ids(len(metadatas))
+            self.client.upload_collection(
+                collection_name=self.collection_name,
+                # A contiguous float32 array (what the embedders return)
+                # goes through as is; anything else is converted once here
+                vectors=np.ascontiguousarray(vectors, dtype=np.float32),
+                payload=metadatas,
+                ids=ids,
+                batch_size=batch_size,
+                parallel=parallel,
+                wait=True
+            )
+            return ids
+        except Exception as e:
+            logger.error("Error uploading chunks: %s", e)
+            raise
+        finally:
+            # After the write, so a search racing with it cannot cache the
+            # collection as it was before
+            self._invalidate_caches()
+
+    def _upsert_stream(self, batches: Iterator[models.Batch]) -> List[str]:
+        """
+        Upsert batches one at a time as they are produced.
+
+        Only the last upsert waits, since a collection applies updates in
+        order; holding one batch back to know which is last means at most
+        two batches are in memory.
+
+        Args:
+            batches: Batches from _iter_batches
+
+        Returns:
+            IDs of all upserted points
+        """
+        ids = []
+        pending = None
+        for batch in batches:
+            if pending is not None:
+                self.client.upsert(collection_name=self.collection_name, points=pending, wait=False)
+            ids.extend(batch.ids)
+            pending = batch
+        if pending is not None:
+            self.client.upsert(collection_name=self.collection_name, points=pending, wait=True)
+        return ids
+
+    @staticmethod
+    def _iter_batches(
+        vectors: Union[np.ndarray, Iterable[List[float]]],
+        metadatas: Iterable[Dict[str, Any]],
+        batch_size: int,
+        ids: Optional[Iterable[str]] = None,
+        use_content_hash: bool = False
+    ) -> Iterator[models.Batch]:
+        """
+        Lazily split points into column-oriented upsert batches.
+
+        A Batch carries one list each of IDs, vectors and payloads instead
+        of a PointStruct per point, so there are fewer objects to build and
+        validate, and the REST request body is columnar. Vectors are
+        converted one batch at a time, so an np.memmap (or any iterable) is
+        only read as far as the upload has got.
+
+        Args:
+            vectors: 2-D array, or iterable of embedding vectors
+            metadatas: Payload of each point, in the same order
+            batch_size: Number of points per batch
+            ids: Point IDs, in the same order (random ones if omitted)
+            use_content_hash: Without ids, derive each ID from its payload
+
+        Yields:
+            Upsert batches covering all points, in order
+        """
+        if hasattr(vectors, '__len__') and hasattr(metadatas, '__len__') and len(vectors) != len(metadatas):
+            raise ValueError("Number of vectors and metadatas must match")
+
+        if isinstance(vectors, np.ndarray):
+            chunks = (vectors[i:i + batch_size] for i in range(0, len(vectors), batch_size))
+        else:
+            vector_iter = iter(vectors)
+            chunks = iter(lambda: list(itertools.islice(vector_iter, batch_size)), [])
+
+        payload_iter = iter(metadatas)
+        id_iter = iter(ids) if ids is not None else None
+        for chunk in chunks:
+            payloads = list(itertools.islice(payload_iter, len(chunk)))
+            if len(payloads) != len(chunk):
+                raise ValueError("Number of vectors and metadatas must match")
+            if id_iter is not None:
+                chunk_ids = list(itertools.islice(id_iter, len(chunk)))
+                if len(chunk_ids) != len(chunk):
+                    raise ValueError("Number of ids and metadatas must match")
+            elif use_content_hash:
+                chunk_ids = _content_ids(payloads)
+            else:
+                chunk_ids = _random_ids(len(chunk))
+            # Both the gRPC and the JSON encoders need Python floats, and one
+            # tolist() per batch is the cheapest way to get them (protobuf
+            # iterates ndarray rows ~3x slower). The columns built here
+            # already have Batch's types, so pydantic validation is skipped
+            yield models.Batch.model_construct(
+                ids=chunk_ids,
+                vectors=np.asarray(chunk, dtype=np.float32).tolist(),
+                payloads=payloads
+            )
+        if next(payload_iter, None) is not None:
+            raise ValueError("Number of vectors and metadatas must match")
+
+    def async_client(self) -> AsyncQdrantClient:
+        """
+        Create an async client for the same server, to share between concurrent calls.
+
+        Close it with ``await client.close()`` when done.
+
+        Returns:
+            AsyncQdrantClient with this database's connection settings
+        """
+        if self._server_settings is None:
+            raise ValueError("Async clients need a Qdrant server; local storage is not shared")
+        return AsyncQdrantClient(**self._server_settings)
+
+    async def insert_batch_async(
+        self,
+        vectors: Union[np.ndarray, List[List[float]]],
+        metadatas: List[Dict[str, Any]],
+        batch_size: int = 64,
+        client: Optional[AsyncQdrantClient] = None
+    ) -> List[str]:
+        """
+        Insert multiple code chunks with all upserts in flight at once.
+
+        Every batch but the last is sent without waiting for it to be
+        applied; the last one waits, and since a collection applies updates
+        in order, the points are all searchable once it returns. Local mode
+        has no server to overlap requests with and inserts in a worker
+        thread instead.
+
         Args:
-            vectors: List of embedding vectors
+            vectors: 2-D float32 array (or list) of embedding vectors
             metadatas: List of metadata dictionaries
+            batch_size: Number of points per upsert request
+            client: Client from async_client() to reuse its connections
+                (a temporary one is created if omitted)
 
         Returns:
             List of IDs for the inserted chunks
         """
+        if self._server_settings is None:
+            return await asyncio.to_thread(self.insert_batch, vectors, metadatas, batch_size=batch_size)
         if len(vectors) != len(metadatas):
             raise ValueError("Number of vectors and metadatas must match")
 
-        points = []
-        ids = []
+        batches = list(self._iter_batches(vectors, metadatas, batch_size))
+        ids = [chunk_id for batch in batches for chunk_id in batch.ids]
+        if not batches:
+            return ids
 
-        for vector, metadata in zip(vectors, metadatas):
-            chunk_id = str(uuid.uuid4())
-            ids.append(chunk_id)
+        owned = client is None
+        if owned:
+            client = self.async_client()
+        try:
+            await asyncio.gather(*(
+                client.upsert(collection_name=self.collection_name, points=batch, wait=False)
+                for batch in batches[:-1]
+            ))
+            # Durability barrier for everything sent before it
+            await client.upsert(collection_name=self.collection_name, points=batches[-1], wait=True)
+        except Exception as e:
+            logger.error("Error inserting chunks: %s", e)
+            raise
+        finally:
+            # After the write, so a search racing with it cannot cache the
+            # collection as it was before
+            self._invalidate_caches()
+            if owned:
+                await client.close()
+
+        logger.info("Inserted %d chunks into the database", len(ids))
+        return ids
+
+    def insert_batch_concurrent(
+        self,
+        vectors: Union[np.ndarray, List[List[float]]],
+        metadatas: List[Dict[str, Any]],
+        batch_size: int = 64
+    ) -> List[str]:
+        """
+        Synchronous wrapper around insert_batch_async (not for use inside an event loop).
+
+        Args:
+            vectors: 2-D float32 array (or list) of embedding vectors
+            metadatas: List of metadata dictionaries
+            batch_size: Number of points per upsert request
 
-            point = PointStruct(
-                id=chunk_id,
-                vector=vector,
-                payload=metadata
+        Returns:
+            List of IDs for the inserted chunks
+        """
+        return asyncio.run(self.insert_batch_async(vectors, metadatas, batch_size=batch_size))
+
+    def delete_by_file(self, file_path: str):
+        """
+        Delete every chunk that was indexed from a file.
+
+        Args:
+            file_path: Value of the chunks' file_path payload field
+        """
+        try:
+            self.client.delete(
+                collection_name=self.collection_name,
+                points_selector=models.FilterSelector(
+                    filter=Filter(
+                        must=[FieldCondition(key="file_path", match=MatchValue(value=file_path))]
+                    )
+                ),
+                wait=True
             )
-            points.append(point)
-
-        # Insert in batches
-        batch_size = 100
-        for i in range(0, len(points), batch_size):
-            batch = points[i:i + batch_size]
-            try:
-                self.client.upsert(
+        finally:
+            # After the write, so a search racing with it cannot cache the
+            # collection as it was before
+            self._invalidate_caches()
+
+    def delete_by_files(self, file_paths: List[str], batch_size: int = 1000):
+        """
+        Delete every chunk that was indexed from any of several files.
+
+        Sends one filtered delete per batch_size files instead of one
+        request per file, and waits only for the last one (a collection
+        applies updates in order).
+
+        Args:
+            file_paths: Values of the chunks' file_path payload field
+            batch_size: Number of file paths per delete request
+        """
+        try:
+            for start in range(0, len(file_paths), batch_size):
+                batch = list(file_paths[start:start + batch_size])
+                self.client.delete(
                     collection_name=self.collection_name,
-                    points=batch,
-                    wait=True  # Wait for operation to complete
+                    points_selector=models.FilterSelector(
+                        filter=Filter(
+                            must=[FieldCondition(key="file_path", match=models.MatchAny(any=batch))]
+                        )
+                    ),
+                    wait=start + batch_size >= len(file_paths)
                 )
-            except Exception as e:
-                print(f"Error inserting batch {i//batch_size + 1}: {e}")
-                raise
-
-        print(f"Inserted {len(points)} chunks into the database")
-        return ids
+        finally:
+            # After the write, so a search racing with it cannot cache the
+            # collection as it was before
+            self._invalidate_caches()
 
     def search(
         self,
-        query_vector: List[float],
+        query_vector: Union[List[float], np.ndarray],
         limit: int = 5,
         score_threshold: Optional[float] = None,
         filter_conditions: Optional[Dict[str, Any]] = None
@@ -176,7 +874,8 @@ class QdrantVectorDB:
         Search for similar code chunks.
 
         Args:
-            query_vector: Query embedding vector
+            query_vector: Query embedding vector (list or 1-D array, passed
+                to the client without conversion)
             limit: Maximum number of results to return
             score_threshold: Minimum similarity score (0-1)
             filter_conditions: Optional filters (e.g., {'chunk_type': 'function'})
@@ -184,52 +883,200 @@ class QdrantVectorDB:
         Returns:
             List of search results with metadata and scores
         """
-        # Build query filter if needed
-        query_filter = None
-        if filter_conditions:
-            conditions = []
-            for key, value in filter_conditions.items():
-                conditions.append(
-                    FieldCondition(
-                        key=key,
-                        match=MatchValue(value=value)
+        # Identical searches within the TTL skip the Qdrant round trip
+        cache_key = None
+        if self.search_cache is not None:
+            cache_key = search_key(query_vector, limit, score_threshold, filter_conditions)
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+        # Local mode already scores exactly, so there is nothing to rerank
+        rerank = self.rerank_oversampling if not self.is_local else None
+
+        results = self.client.query_points(
+            collection_name=self.collection_name,
+            query=query_vector,
+            limit=limit * rerank if rerank else limit,
+            # Approximate scores could drop candidates the rerank would keep
+            score_threshold=None if rerank else score_threshold,
+            query_filter=self._query_filter(filter_conditions),
+            search_params=self._search_params(),
+            with_payload=True,
+            with_vectors=bool(rerank)
+        ).points
+
+        formatted_results = self._format_results(query_vector, results, limit, score_threshold)
+        if cache_key is not None:
+            self.search_cache.put(cache_key, formatted_results)
+
+        return formatted_results
+
+    def search_many(
+        self,
+        query_vectors: Union[np.ndarray, List[List[float]]],
+        limit: int = 5,
+        score_threshold: Optional[float] = None,
+        filter_conditions: Optional[Dict[str, Any]] = None,
+        batch_size: int = 128
+    ) -> List[List[Dict[str, Any]]]:
+        """
+        Search for several queries, sending up to batch_size of them per request.
+
+        Args:
+            query_vectors: 2-D array (or list) of query embedding vectors
+            limit: Maximum number of results per query
+            score_threshold: Minimum similarity score (0-1)
+            filter_conditions: Optional filters applied to every query
+            batch_size: Number of queries per request
+
+        Returns:
+            One result list per query (as returned by search), in input order
+        """
+        results: List[Optional[List[Dict[str, Any]]]] = [None] * len(query_vectors)
+
+        # Cached searches are answered here; only the rest go to Qdrant
+        cache_keys = [None] * len(query_vectors)
+        pending = []
+        for i, query_vector in enumerate(query_vectors):
+            if self.search_cache is not None:
+                cache_keys[i] = search_key(query_vector, limit, score_threshold, filter_conditions)
+                cached = self.search_cache.get(cache_keys[i])
+                if cached is not None:
+                    results[i] = cached
+                    continue
+            pending.append(i)
+
+        rerank = self.rerank_oversampling if not self.is_local else None
+        query_filter = self._query_filter(filter_conditions)
+        search_params = self._search_params()
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            responses = self.client.query_batch_points(
+                collection_name=self.collection_name,
+                requests=[
+                    models.QueryRequest(
+                        query=np.asarray(query_vectors[i], dtype=np.float32).tolist(),
+                        limit=limit * rerank if rerank else limit,
+                        score_threshold=None if rerank else score_threshold,
+                        filter=query_filter,
+                        params=search_params,
+                        with_payload=True,
+                        with_vector=bool(rerank)
                     )
-                )
-            query_filter = Filter(must=conditions)
+                    for i in batch
+                ]
+            )
+            for i, response in zip(batch, responses):
+                results[i] = self._format_results(query_vectors[i], response.points, limit, score_threshold)
+                if cache_keys[i] is not None:
+                    self.search_cache.put(cache_keys[i], results[i])
 
-        # Use query_points (newer API) or search (older API)
+        return results
+
+    @staticmethod
+    def _query_filter(filter_conditions: Optional[Dict[str, Any]]) -> Optional[Filter]:
+        """Build (or reuse) a filter matching every key/value pair of filter_conditions."""
+        if not filter_conditions:
+            return None
+        items = tuple(sorted(filter_conditions.items()))
         try:
-            # Try newer API first
-            results = self.client.query_points(
-                collection_name=self.collection_name,
-                query=query_vector,
-                limit=limit,
-                score_threshold=score_threshold,
-                query_filter=query_filter
-            ).points
-        except AttributeError:
-            # Fallback to older API
-            results = self.client.search(
-                collection_name=self.collection_name,
-                query_vector=query_vector,
-                limit=limit,
-                score_threshold=score_threshold,
-                query_filter=query_filter
+            return _compile_filter(items)
+        except TypeError:
+            # Unhashable values cannot be memoized
+            return _compile_filter.__wrapped__(items)
+
+    def _search_params(self) -> Optional[models.SearchParams]:
+        """Search parameters of the configured profile (None in local mode)."""
+        if self.is_local:
+            return None
+
+        # Search the quantized vectors, then rescore the best candidates
+        profile = SEARCH_PROFILES[self.search_profile]
+        quantization_params = None
+        if self.quantization:
+            quantization_params = models.QuantizationSearchParams(
+                rescore=profile["rescore"],
+                oversampling=profile["oversampling"]
+            )
+        if profile["hnsw_ef"] or quantization_params:
+            return models.SearchParams(
+                hnsw_ef=profile["hnsw_ef"],
+                quantization=quantization_params
             )
+        return None
 
-        # Format results
-        formatted_results = []
-        for result in results:
-            formatted_results.append({
-                "id": result.id,
-                "score": result.score,
-                "metadata": result.payload
-            })
+    def _format_results(
+        self,
+        query_vector,
+        points,
+        limit: int,
+        score_threshold: Optional[float]
+    ) -> List[Dict[str, Any]]:
+        """Turn returned points into result dictionaries, reranking them first if enabled."""
+        if self.rerank_oversampling and not self.is_local:
+            points, scores = self._rerank(query_vector, points, limit, score_threshold)
+            return [
+                {"id": point.id, "score": score, "metadata": point.payload}
+                for point, score in zip(points, scores)
+            ]
 
-        return formatted_results
+        # A dict display per point is the cheapest way to build these
+        return [{"id": point.id, "score": point.score, "metadata": point.payload} for point in points]
+
+    @staticmethod
+    def _rerank(query_vector, points, limit: int, score_threshold: Optional[float]):
+        """
+        Rank candidate points by exact cosine similarity to the query.
+
+        Args:
+            query_vector: Query embedding vector
+            points: Candidates returned with their vectors
+            limit: Number of points to keep
+            score_threshold: Minimum exact similarity
+
+        Returns:
+            (best points, their scores), best first
+        """
+        if not points:
+            return [], []
+
+        # One matrix-vector product over all candidates
+        vectors = np.asarray([point.vector for point in points], dtype=np.float32)
+        query = np.asarray(query_vector, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        scores = (vectors @ query) / np.maximum(norms, 1e-12)
+
+        if limit < len(scores):
+            top = np.argpartition(-scores, limit - 1)[:limit]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind='stable')]
+        if score_threshold is not None:
+            top = top[scores[top] >= score_threshold]
+
+        return [points[i] for i in top], scores[top].tolist()
+
+    def _invalidate_caches(self):
+        """Forget cached search results and collection info after the collection changed."""
+        self._info_cache = (0.0, None)
+        if self.search_cache is not None:
+            self.search_cache.invalidate()
 
     def get_collection_info(self) -> Dict[str, Any]:
-        """Get information about the collection."""
+        """
+        Get information about the collection.
+
+        Repeated calls within INFO_CACHE_TTL seconds, with no write through
+        this instance in between, reuse the previous answer instead of
+        asking the server again.
+        """
+        fetched, cached = self._info_cache
+        now = time.monotonic()
+        if cached is not None and now - fetched < self.INFO_CACHE_TTL:
+            return dict(cached)
+
         try:
             info = self.client.get_collection(collection_name=self.collection_name)
             # Handle different API versions
@@ -242,11 +1089,13 @@ class QdrantVectorDB:
 
             status = getattr(info, 'status', 'unknown')
 
-            return {
+            result = {
                 "name": self.collection_name,
                 "vectors_count": vectors_count or 0,
                 "points_count": points_count or 0,
                 "status": str(status)
             }
+            self._info_cache = (now, result)
+            return dict(result)
         except Exception as e:
             return {"error": str(e)}
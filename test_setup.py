@@ -2,6 +2,7 @@
 Simple test to verify LogAgent installation and basic functionality.
 """
 
+import os
 import sys
 
 
@@ -41,45 +42,80 @@ def test_imports():
     return True
 
 
+def test_splitter():
+    """Test code splitting (no model needed)."""
+    print("  Testing code splitter...")
+    from src.code_splitter import ASTCodeSplitter
+    splitter = ASTCodeSplitter()
+
+    # Split this test file
+    chunks = splitter.split_python_file(__file__)
+    print(f"  ✓ Code splitter working ({len(chunks)} chunks extracted)")
+
+
+def test_vector_db():
+    """Test an in-memory vector database with a random vector (no model needed)."""
+    print("  Testing vector database...")
+    import numpy as np
+    from src.vector_db import QdrantVectorDB
+
+    vector_db = QdrantVectorDB(use_memory=True)
+    vector_db.create_collection(vector_size=768)
+    vector = np.random.rand(768).astype(np.float32)
+    vector_db.insert_chunk(vector=vector, metadata={"test": "data"})
+    results = vector_db.search(vector, limit=1)
+    assert results and results[0]["metadata"] == {"test": "data"}
+    print("  ✓ Vector database working")
+
+
+def test_embedder():
+    """Test LogAgent end to end with the embedding model (downloaded on first use)."""
+    if os.environ.get("SKIP_HEAVY"):
+        if "pytest" in sys.modules:
+            # Under pytest, report the test as skipped rather than passed
+            import pytest
+            pytest.skip("SKIP_HEAVY is set")
+        print("  - Skipping embedder test (SKIP_HEAVY is set)")
+        return
+
+    from src.logagent import LogAgent
+
+    # Initialize with in-memory DB
+    print("  Initializing LogAgent...")
+    agent = LogAgent(use_memory_db=True)
+    print("  ✓ LogAgent initialized")
+
+    # Setup
+    print("  Setting up database...")
+    agent.setup()
+    print("  ✓ Database setup complete")
+
+    # Test embedding (with a small sample)
+    print("  Testing embedder...")
+    sample_code = "def hello(): return 'world'"
+    embedding = agent.embedder.embed_code(sample_code)
+    print(f"  ✓ Embedder working (dimension: {len(embedding)})")
+
+    agent.vector_db.insert_chunk(
+        vector=embedding,
+        metadata={"test": "data"}
+    )
+    print("  ✓ Embeddings stored")
+
+
 def test_basic_functionality():
-    """Test basic LogAgent functionality."""
+    """
+    Test basic LogAgent functionality.
+
+    Set SKIP_HEAVY=1 to skip the test that needs the embedding model, e.g.
+    on CI runs without a cached model download.
+    """
     print("\nTesting basic functionality...")
 
     try:
-        from src.logagent import LogAgent
-
-        # Initialize with in-memory DB
-        print("  Initializing LogAgent...")
-        agent = LogAgent(use_memory_db=True)
-        print("  ✓ LogAgent initialized")
-
-        # Setup
-        print("  Setting up database...")
-        agent.setup()
-        print("  ✓ Database setup complete")
-
-        # Test code splitting
-        print("  Testing code splitter...")
-        from src.code_splitter import ASTCodeSplitter
-        splitter = ASTCodeSplitter()
-
-        # Split this test file
-        chunks = splitter.split_python_file(__file__)
-        print(f"  ✓ Code splitter working ({len(chunks)} chunks extracted)")
-
-        # Test embedding (with a small sample)
-        print("  Testing embedder...")
-        sample_code = "def hello(): return 'world'"
-        embedding = agent.embedder.embed_code(sample_code)
-        print(f"  ✓ Embedder working (dimension: {len(embedding)})")
-
-        # Test vector DB
-        print("  Testing vector database...")
-        agent.vector_db.insert_chunk(
-            vector=embedding,
-            metadata={"test": "data"}
-        )
-        print("  ✓ Vector database working")
+        test_splitter()
+        test_vector_db()
+        test_embedder()
 
         print("\nAll tests passed! ✓")
         return True